@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the greatest convex minorant in unidip.dip. Compares the 
+linear monotone chain with the former implementation, which searched the 
+minimal slope from every touchpoint (quadratic for concave input), and 
+checks that the dip statistics are bit-identical.
+
+Usage:
+    python benchmarks/bench_dip.py
+"""
+
+from time import perf_counter
+import numpy as np
+from md_plot.unidip import dip
+
+
+def gcm_quadratic(cdf, idxs):
+    # former implementation of unidip.dip._gcm_
+    work_cdf = cdf
+    work_idxs = idxs
+    gcm = [work_cdf[0]]
+    touchpoints = [0]
+    while len(work_cdf) > 1:
+        distances = work_idxs[1:] - work_idxs[0]
+        slopes = (work_cdf[1:] - work_cdf[0]) / distances
+        minslope = slopes.min()
+        minslope_idx = np.where(slopes == minslope)[0][0] + 1
+        gcm.extend(work_cdf[0] + distances[:minslope_idx] * minslope)
+        touchpoints.append(touchpoints[-1] + minslope_idx)
+        work_cdf = work_cdf[minslope_idx:]
+        work_idxs = work_idxs[minslope_idx:]
+    return np.array(np.array(gcm)), np.array(touchpoints)
+
+
+def dip_with(gcm, data, is_hist=False):
+    gcm_linear = dip._gcm_
+    dip._gcm_ = gcm
+    try:
+        return dip.dip_fn(data, is_hist)
+    finally:
+        dip._gcm_ = gcm_linear
+
+
+def check_identical(rng, repeat=200):
+    lstData = []
+    for i in range(repeat):
+        n = rng.integers(5, 2000)
+        lstData.append((rng.normal(size=n), False))
+        lstData.append((np.round(rng.normal(size=n), 1), False))
+        lstData.append((np.r_[rng.normal(size=n), rng.normal(4, size=n)], 
+                        False))
+        lstData.append((rng.exponential(size=n) ** 3, False))
+        lstData.append((rng.integers(0, 20, size=n), False))
+        lstData.append((rng.integers(0, 50, size=40), True))
+        lstData.append((np.ones(30), True))
+    for data, is_hist in lstData:
+        try:
+            dQuad, (cdfQ, _, leftQ, leftPartQ, rightQ, rightPartQ) = \
+            dip_with(gcm_quadratic, data, is_hist)
+        except IndexError:
+            # the former implementation fails if two values collapse in 
+            # floating point (nan slopes), the linear one has to fail too
+            try:
+                dip.dip_fn(data, is_hist)
+            except IndexError:
+                continue
+            raise Exception("Only the former implementation fails")
+        dLinear, (cdfL, _, left, leftPart, right, rightPart) = \
+        dip.dip_fn(data, is_hist)
+        if dLinear != dQuad or not np.array_equal(left, leftQ) \
+        or not np.array_equal(right, rightQ):
+            raise Exception("Dip differs for sample of size {}"
+                            .format(len(data)))
+        if leftPart is not None and \
+        (not np.array_equal(leftPart, leftPartQ) 
+         or not np.array_equal(rightPart, rightPartQ)):
+            raise Exception("Minorants differ for sample of size {}"
+                            .format(len(data)))
+    print("dip_fn identical on {} samples".format(len(lstData)))
+
+
+def timeit(func, *args):
+    start = perf_counter()
+    func(*args)
+    return perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(7)
+    check_identical(rng)
+    
+    print()
+    print("{:>10} {:>14} {:>14} {:>14} {:>14}".format("n", "gcm linear [s]", 
+                                                      "gcm former [s]", 
+                                                      "dip linear [s]", 
+                                                      "dip former [s]"))
+    for n in [10**3, 10**4, 10**5, 10**6]:
+        # concave cdf: worst case of the former implementation
+        idxs = np.arange(n, dtype=float)
+        cdf = np.sqrt(np.linspace(0, 1, n))
+        tLinear = timeit(dip._gcm_, -cdf, idxs)
+        tQuad = timeit(gcm_quadratic, -cdf, idxs) if n <= 10**5 else np.nan
+        
+        data = rng.normal(size=n)
+        tDipLinear = timeit(dip.dip_fn, data)
+        tDipQuad = timeit(dip_with, gcm_quadratic, data) \
+        if n <= 10**5 else np.nan
+        print("{:>10} {:>14.4f} {:>14.4f} {:>14.4f} {:>14.4f}"
+              .format(n, tLinear, tQuad, tDipLinear, tDipQuad))
+
+
+if __name__ == "__main__":
+    main()
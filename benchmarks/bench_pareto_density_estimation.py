@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of pareto_density_estimation. Checks the shipped function against
+the former implementation (pdist for the pareto radius, mquantiles for the
+number of bins and one mask over all data per kernel) on normal, tied,
+constant, tiny and nan data and the binned counting against the exact one,
+then compares the run times over the number of data points and over the
+number of kernels.
+
+Usage:
+    python benchmarks/bench_pareto_density_estimation.py
+"""
+
+import warnings
+from math import ceil
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import pdist
+from scipy.stats.mstats import mquantiles
+from md_plot.helper.pareto_density_estimation import pareto_density_estimation
+from md_plot.helper.pretty import pretty
+
+
+def reference_pareto_radius(data):
+    # former pareto_radius of one column without sampling (<= 10000 values)
+    distvec = pdist(data.values[:, np.newaxis])
+    paretoRadius = mquantiles(distvec, 18/100, alphap=1/3, betap=1/3)[0]
+    if paretoRadius == 0:
+        pzt = pd.Series(mquantiles(distvec, [(x+1)/100 for x in range(100)],
+                                   alphap=1/3, betap=1/3)).dropna()
+        paretoRadius = pzt[pzt > 0].min()
+    if len(data) > 1024:
+        paretoRadius = paretoRadius * 4 / len(data)**0.2
+    return paretoRadius
+
+
+def reference_kernels(data, minAnzKernels=100):
+    # former optimal_no_bins and kernels of pareto_density_estimation
+    sigma = data.std()
+    p = mquantiles(data, [0.25, 0.75], alphap=1/3, betap=1/3)
+    sigmaSir = min(sigma, (p[1] - p[0]) / 1.349)
+    optBinWidth = (3.49 * sigmaSir) / (len(data)**(1/3))
+    if optBinWidth > 0:
+        nBins = max(ceil((data.max() - data.min()) / optBinWidth), 10)
+    else:
+        nBins = 10
+    nBins = max(minAnzKernels, nBins)
+    if nBins > 100:
+        nBins = 10000 if nBins > 10000 else nBins * 3 + 1
+    breaks = pretty(data.min(), data.max(), nBins)
+    return 0.5 * (breaks[1:] + breaks[:-1])
+
+
+def reference_dirac(values):
+    # former kernels and densities of 1 or 2 unique values
+    lstKernels = []
+    lstDensity = []
+    for value in values:
+        if value != 0:
+            kernels = np.arange(value * 0.9, value * 1.1, value * 0.0001)
+        else:
+            kernels = np.arange(value - 0.1, value + 0.1, 0.0001)
+        density = np.zeros(len(kernels))
+        midPoint = np.where(np.round(kernels, 4) == np.round(value, 4))[0][0]
+        density[midPoint] = 1
+        lstKernels.extend(kernels)
+        lstDensity.extend(density)
+    return np.array(lstKernels), np.array(lstDensity), 0
+
+
+def count_loop(dataPlus, kernels, paretoRadius):
+    # former implementation: one boolean mask over all data per kernel
+    paretoDensity = []
+    for fltKernel in kernels:
+        lb = fltKernel - paretoRadius
+        ub = fltKernel + paretoRadius
+        dataTemp = dataPlus[(dataPlus >= lb) & (dataPlus <= ub)]
+        paretoDensity.append(len(dataTemp))
+    return np.array(paretoDensity)
+
+
+def reference_pareto_density(data):
+    """
+    Former pareto_density_estimation with default arguments, for data of at
+    most 10000 finite values
+    
+    Returns:
+        kernels, paretoDensity and paretoRadius
+    """
+    data = pd.Series(data, dtype=float)
+    data = data[np.isfinite(data)]
+    values = data.unique()
+    if len(values) <= 2:
+        return reference_dirac(values)
+    
+    paretoRadius = reference_pareto_radius(data)
+    kernels = reference_kernels(data)
+    minData = data.min()
+    maxData = data.max()
+    lowR = 2 * minData - data[data < (minData + paretoRadius)]
+    upR = 2 * maxData - data[data > (maxData - paretoRadius)]
+    dataPlus = pd.concat([data, lowR, upR])
+    
+    paretoDensity = count_loop(dataPlus, kernels, paretoRadius)
+    area = np.trapz(paretoDensity, kernels)
+    if (pd.isnull(area)) | (area < 0.0000000001):
+        return kernels, np.zeros(len(kernels)), paretoRadius
+    return kernels, paretoDensity / area, paretoRadius
+
+
+def reference_kernel_counts(data, kernels, paretoRadius):
+    # former mirroring and counting for given kernels and radius
+    minData = data.min()
+    maxData = data.max()
+    lowR = 2 * minData - data[data < (minData + paretoRadius)]
+    upR = 2 * maxData - data[data > (maxData - paretoRadius)]
+    dataPlus = pd.concat([data, lowR, upR])
+    return count_loop(dataPlus, kernels, paretoRadius)
+
+
+def equivalence_cases(rng):
+    dctCases = {}
+    for n in [10, 100, 1000, 3000]:
+        dctCases["normal n=%d" % n] = rng.normal(size=n)
+        dctCases["ties n=%d" % n] = rng.integers(0, 10, n).astype(float)
+        dctCases["lognormal n=%d" % n] = rng.lognormal(0, 1.5, n)
+    dctCases["constant"] = np.full(50, 5.0)
+    dctCases["constant zero"] = np.zeros(20)
+    dctCases["two values"] = np.array([2.0] * 30 + [3.0] * 5)
+    dctCases["tiny n=3"] = np.array([1.0, 2.0, 4.0])
+    dctCases["tiny n=5"] = np.array([0.5, 0.1, 0.9, 0.3, 0.7])
+    withNan = rng.normal(size=500)
+    withNan[::7] = np.nan
+    withNan[::50] = np.inf
+    dctCases["nan and inf n=500"] = withNan
+    return dctCases
+
+
+def check_equivalence(rng):
+    """
+    Raises an exception if pareto_density_estimation differs from the
+    former implementation in kernels, radius or densities
+    """
+    for name, data in equivalence_cases(rng).items():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            kernels, density, radius = reference_pareto_density(data)
+            dens = pareto_density_estimation(pd.Series(data), binned=False)
+        if not (np.allclose(dens["kernels"], kernels, rtol=1e-12, atol=0)
+                and np.allclose(dens["paretoDensity"], density, rtol=1e-12,
+                                atol=0)
+                and np.isclose(dens["paretoRadius"], radius, rtol=1e-12,
+                               atol=0)):
+            raise Exception("pareto_density_estimation differs from the "
+                            "former implementation for " + name)
+        print("{:<24} equal ({} kernels)".format(name, len(kernels)))
+
+
+def binned_cases(rng):
+    dctCases = {}
+    dctCases["normal n=100000"] = rng.normal(size=10**5)
+    dctCases["lognormal n=100000"] = rng.lognormal(0, 1.5, 10**5)
+    dctCases["ties n=100000"] = rng.integers(0, 10, 10**5).astype(float)
+    # huge magnitude and tiny range, the index of the bins exceeds int64
+    dctCases["1e300 + ulps"] = 1e300 + np.spacing(1e300) \
+    * rng.integers(0, 10, 20000)
+    dctCases["-1e300 - ulps"] = -1e300 - np.spacing(1e300) \
+    * rng.integers(0, 10, 20000)
+    dctCases["1e10 + 1e-5 * uniform"] = 1e10 + 1e-5 * rng.uniform(size=20000)
+    dctCases["1e300 * (1 + 1e-12 * uniform)"] = 1e300 \
+    * (1 + 1e-12 * rng.uniform(size=20000))
+    return dctCases
+
+
+def check_binned(rng, tolerance=0.02):
+    """
+    Raises an exception if the binned densities of pareto_density_estimation
+    are not finite or differ from the exact ones by more than tolerance
+    times the maximal density
+    """
+    for name, data in binned_cases(rng).items():
+        data = pd.Series(data)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            warnings.simplefilter("error", RuntimeWarning)
+            exact = pareto_density_estimation(data, binned=False)
+            binned = pareto_density_estimation(data, binned=True)
+        exactDensity = np.asarray(exact["paretoDensity"])
+        binnedDensity = np.asarray(binned["paretoDensity"])
+        error = np.max(np.abs(binnedDensity - exactDensity))
+        if not (np.array_equal(binned["kernels"], exact["kernels"])
+                and np.all(np.isfinite(binnedDensity))
+                and error <= tolerance * np.max(exactDensity)):
+            raise Exception("binned pareto_density_estimation differs from "
+                            "the exact one for " + name)
+        print("{:<30} max. difference {:.2e}".format(name, error))
+
+
+def time_kernels(data, lstKernels):
+    """
+    Times the counting of the former implementation, O(n * nKernels),
+    against the shipped one, O((n + nKernels) * log(n)), for explicit
+    kernels of increasing number and a fixed radius
+    """
+    paretoRadius = reference_pareto_radius(data)
+    for nKernels in lstKernels:
+        kernels = np.linspace(data.min(), data.max(), nKernels)
+        tFormer, counts = timeit(reference_kernel_counts, data, kernels,
+                                 paretoRadius, repeat=1)
+        # the kernels are passed as list, an array is not accepted
+        tCurrent, dens = timeit(lambda: pareto_density_estimation(
+            data, paretoRadius=paretoRadius, kernels=kernels.tolist(),
+            binned=False))
+        area = np.trapz(counts, kernels)
+        if not np.allclose(dens["paretoDensity"], counts / area, 
+                           rtol=1e-12, atol=0):
+            raise Exception("pareto_density_estimation differs from the "
+                            "former counting for %d kernels" % nKernels)
+        print("{:>10} {:>10} {:>12.4f} {:>12.4f} {:>8.1f}".format(
+            len(data), nKernels, tFormer, tCurrent, tFormer / tCurrent))
+
+
+def timeit(func, *args, repeat=3):
+    lstTimes = []
+    for i in range(repeat):
+        start = perf_counter()
+        result = func(*args)
+        lstTimes.append(perf_counter() - start)
+    return min(lstTimes), result
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print("equivalence with the former implementation")
+    check_equivalence(rng)
+    
+    print()
+    print("binned against exact counting")
+    check_binned(rng)
+    
+    print()
+    print("{:>10} {:>12} {:>12} {:>8}".format("n", "former [s]",
+                                              "current [s]", "speedup"))
+    for n in [10**3, 3 * 10**3, 10**4]:
+        data = pd.Series(rng.normal(size=n))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            tFormer, _ = timeit(reference_pareto_density, data, repeat=1)
+        tCurrent, _ = timeit(pareto_density_estimation, data)
+        print("{:>10} {:>12.4f} {:>12.4f} {:>8.1f}".format(n, tFormer,
+                                                          tCurrent,
+                                                          tFormer / tCurrent))
+    
+    print()
+    print("counting for explicit kernels")
+    print("{:>10} {:>10} {:>12} {:>12} {:>8}".format("n", "nKernels",
+                                                     "former [s]",
+                                                     "current [s]",
+                                                     "speedup"))
+    for n in [10**3, 10**4]:
+        time_kernels(pd.Series(rng.normal(size=n)), 
+                     [10**2, 10**3, 10**4, 3 * 10**4])
+    
+    print()
+    print("pareto_density_estimation end-to-end")
+    for n in [10**5, 10**6, 10**7]:
+        data = pd.Series(rng.normal(size=n))
+        tTotal, _ = timeit(pareto_density_estimation, data)
+        print("{:>10} {:>12.4f} s".format(n, tTotal))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of the hot paths of md_plot: MDplot end-to-end (including
+drawing the plot) on the bundled examples and on synthetic data in wide and
+long table format, pareto_density_estimation, pareto_radius, bimodal,
+dip.diptst, UniDip.run, robust_normalization and column_profile. Synthetic
+data varies the number of rows, columns and unique values per column.
+
+Each case runs in a fresh process, which reports the wall time (best of
+the repeated runs) and the peak resident set size (RSS) of the process and
+its increase during the runs, so memory of one case cannot hide in the
+peak of an earlier one. Results can be saved as json and compared with an
+earlier run, the comparison fails if a case got slower or needs more
+memory than the tolerance allows.
+
+Usage:
+    python benchmarks/bench_suite.py                  (quick sizes)
+    python benchmarks/bench_suite.py --full           (up to 1e7 rows and
+                                                       1000 columns)
+    python benchmarks/bench_suite.py --filter pareto --repeat 5
+    python benchmarks/bench_suite.py --save before.json
+    python benchmarks/bench_suite.py --compare before.json --tolerance 0.25
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import sys
+import warnings
+from time import perf_counter
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from md_plot import MDplot, load_examples
+from md_plot.helper import pareto_density_estimation, pareto_radius, \
+bimodal, robust_normalization
+from md_plot.helper.column_profile import column_profile
+from md_plot.unidip import dip
+from md_plot.unidip.unidip import UniDip
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, psutil is used if installed
+    resource = None
+
+
+#___________________________________________________________________Memory
+def current_rss():
+    """ current resident set size of the process in bytes (nan if unknown) """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return np.nan
+
+
+def peak_rss():
+    """ peak resident set size of the process in bytes (nan if unknown) """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return np.nan
+
+
+#_____________________________________________________________________Data
+def synthetic_frame(n, nCols, nUnique=None, seed=0):
+    """
+    Wide dataframe with normal, bimodal, skewed and uniform columns in turn
+    
+    Args:
+        n (int): number of rows
+        nCols (int): number of columns
+        nUnique (int): maximal number of unique values per column, None
+                       keeps continuous values
+        seed (int): seed of the data
+    
+    Returns:
+        dataframe
+    """
+    rng = np.random.default_rng(seed)
+    dctCols = {}
+    for j in range(nCols):
+        if j % 4 == 0:
+            values = rng.normal(size=n)
+        elif j % 4 == 1:
+            values = np.where(rng.random(n) < 0.5, rng.normal(-2, 1, n),
+                              rng.normal(2, 1, n))
+        elif j % 4 == 2:
+            values = rng.lognormal(size=n)
+        else:
+            values = rng.uniform(size=n)
+        if nUnique is not None:
+            values = np.floor((values - values.min()) / np.ptp(values)
+                              * (nUnique - 1))
+        dctCols["V" + str(j)] = values
+    return pd.DataFrame(dctCols)
+
+
+def synthetic_long(n, nClasses, seed=0):
+    """ long dataframe with the columns value and class """
+    rng = np.random.default_rng(seed)
+    classes = rng.integers(0, nClasses, n)
+    return pd.DataFrame({"value": rng.normal(size=n) + classes % 7,
+                         "class": pd.Series(classes).map(lambda x:
+                                                         "K" + str(x))})
+
+
+def setup_frame(n, nCols=1, nUnique=None):
+    return (synthetic_frame(n, nCols, nUnique),)
+
+
+def setup_series(n):
+    return (synthetic_frame(n, 2)["V1"],)
+
+
+def setup_array(n):
+    return (synthetic_frame(n, 2)["V1"].values,)
+
+
+def setup_mdplot(n, nCols, nUnique=None, **kwargs):
+    return synthetic_frame(n, nCols, nUnique), kwargs
+
+
+def setup_mdplot_long(n, nClasses, **kwargs):
+    kwargs.update({"ValueColumn": "value", "ClassColumn": "class"})
+    return synthetic_long(n, nClasses), kwargs
+
+
+def setup_example(name):
+    data = load_examples()[name]
+    kwargs = {}
+    if name == "SkewedDistributionLongTable":
+        kwargs = {"ValueColumn": "value", "ClassColumn": "class"}
+    return data, kwargs
+
+
+#_____________________________________________________________________Runs
+def run_mdplot(data, kwargs):
+    plot = MDplot(data, **kwargs)
+    fig = plot.draw()
+    plt.close(fig)
+
+
+def run_pareto_density_estimation(data):
+    pareto_density_estimation(data)
+
+
+def run_pareto_density_estimation_binned(data):
+    pareto_density_estimation(data, binned=True)
+
+
+def run_pareto_radius(data):
+    pareto_radius(data)
+
+
+def run_bimodal(data):
+    bimodal(data)
+
+
+def run_diptst(data):
+    dip.diptst(data)
+
+
+def run_diptst_simulate(data):
+    dip.diptst(data, numt=100, simulate=True)
+
+
+def run_unidip(data):
+    UniDip(data).run()
+
+
+def run_robust_normalization(data):
+    robust_normalization(data, centered=True, capped=True)
+
+
+def run_column_profile(data):
+    column_profile(data)
+
+
+#____________________________________________________________________Cases
+def make_cases(full=False):
+    """
+    Benchmark cases, the full suite adds up to 1e7 rows and 1000 columns
+    
+    Returns:
+        list of dictionaries containing name, setup, params and run
+    """
+    lstCases = []
+    def add(name, setup, params, run):
+        lstCases.append({"name": name, "setup": setup, "params": params,
+                         "run": run})
+    
+    lstSizes = [10**3, 10**4, 10**5] + ([10**6, 10**7] if full else [])
+    for n in lstSizes:
+        add("pareto_density_estimation n=%.0e" % n, "setup_series",
+            {"n": n}, "run_pareto_density_estimation")
+        add("pareto_density_estimation binned n=%.0e" % n, "setup_series",
+            {"n": n}, "run_pareto_density_estimation_binned")
+        add("pareto_radius n=%.0e" % n, "setup_series", {"n": n},
+            "run_pareto_radius")
+        add("bimodal n=%.0e" % n, "setup_series", {"n": n}, "run_bimodal")
+        if n <= 10**6:
+            add("diptst n=%.0e" % n, "setup_array", {"n": n},
+                "run_diptst")
+            add("UniDip.run n=%.0e" % n, "setup_array", {"n": n},
+                "run_unidip")
+        if n <= 10**4:
+            add("diptst simulate numt=100 n=%.0e" % n, "setup_array", 
+                {"n": n}, "run_diptst_simulate")
+        add("robust_normalization n=%.0e cols=10" % n, "setup_frame",
+            {"n": n, "nCols": 10}, "run_robust_normalization")
+        add("column_profile n=%.0e cols=10" % n, "setup_frame",
+            {"n": n, "nCols": 10}, "run_column_profile")
+    
+    # MDplot on synthetic data: rows, columns and unique values
+    for n in [10**3, 10**4, 10**5] + ([10**6, 10**7] if full else []):
+        add("MDplot n=%.0e cols=10" % n, "setup_mdplot",
+            {"n": n, "nCols": 10}, "run_mdplot")
+    if full:
+        # densities of all rows without sampling, counted on binned data
+        add("MDplot n=5e+06 cols=4 SampleSize=n", "setup_mdplot",
+            {"n": 5 * 10**6, "nCols": 4, "SampleSize": 5 * 10**6},
+            "run_mdplot")
+    lstCols = [(10**4, 1), (10**4, 100)] + ([(10**3, 1000)] if full else [])
+    for n, nCols in lstCols:
+        add("MDplot n=%.0e cols=%d" % (n, nCols), "setup_mdplot",
+            {"n": n, "nCols": nCols}, "run_mdplot")
+    for nUnique in [5, 50, 5000]:
+        add("MDplot n=1e+05 cols=10 unique=%d" % nUnique, "setup_mdplot",
+            {"n": 10**5, "nCols": 10, "nUnique": nUnique}, "run_mdplot")
+    add("MDplot n=1e+04 cols=10 BoxPlot Statistics", "setup_mdplot",
+        {"n": 10**4, "nCols": 10, "BoxPlot": True,
+         "Ordering": "Statistics"}, "run_mdplot")
+    
+    # long table format, reshaped to wide
+    lstLong = [(10**4, 10), (10**5, 1000)] \
+    + ([(10**6, 1000), (10**7, 100)] if full else [])
+    for n, nClasses in lstLong:
+        add("MDplot long n=%.0e classes=%d" % (n, nClasses),
+            "setup_mdplot_long", {"n": n, "nClasses": nClasses,
+                                  "RobustGaussian": False,
+                                  "Ordering": "Columnwise"}, "run_mdplot")
+    
+    # bundled examples
+    for name in load_examples():
+        add("MDplot example " + name, "setup_example", {"name": name},
+            "run_mdplot")
+    return lstCases
+
+
+#___________________________________________________________________Runner
+# minimal measured time per case in seconds
+MIN_TOTAL_TIME = 0.5
+# time differences below this number of seconds are no regression
+MIN_TIME_DIFFERENCE = 0.01
+
+def _run_case(case, repeat, conn):
+    warnings.filterwarnings("ignore")
+    args = globals()[case["setup"]](**case["params"])
+    func = globals()[case["run"]]
+    gc.collect()
+    rssBefore = current_rss()
+    lstTimes = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        # fast cases are repeated until MIN_TOTAL_TIME to reduce the noise
+        while len(lstTimes) < repeat or (sum(lstTimes) < MIN_TOTAL_TIME 
+                                         and len(lstTimes) < 100):
+            start = perf_counter()
+            func(*args)
+            lstTimes.append(perf_counter() - start)
+    peak = peak_rss()
+    conn.send({"time": min(lstTimes), "peakRss": peak,
+               "rssIncrease": max(peak - rssBefore, 0)})
+    conn.close()
+
+
+def run_case(case, repeat=1, timeout=600):
+    """
+    Runs a case in a fresh process
+    
+    Returns:
+        dictionary containing time [s], peakRss and rssIncrease [bytes],
+        values are nan if the case failed or timed out
+    """
+    ctx = multiprocessing.get_context("spawn")
+    connParent, connChild = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_run_case, args=(case, repeat, connChild))
+    process.start()
+    connChild.close()
+    dctResult = {"time": np.nan, "peakRss": np.nan, "rssIncrease": np.nan}
+    if connParent.poll(timeout):
+        try:
+            dctResult = connParent.recv()
+        except EOFError:
+            # the case raised an exception, the traceback is printed by
+            # the child
+            pass
+    process.join(5)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    return dctResult
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of md_plot")
+    parser.add_argument("--full", action="store_true",
+                        help="include up to 1e7 rows and 1000 columns")
+    parser.add_argument("--filter", default=None,
+                        help="only cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="minimal runs per case, the best time is "
+                        "reported")
+    parser.add_argument("--timeout", type=float, default=600,
+                        help="seconds per case")
+    parser.add_argument("--save", default=None,
+                        help="save the results as json")
+    parser.add_argument("--compare", default=None,
+                        help="json of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative increase of time and memory")
+    args = parser.parse_args()
+    
+    lstCases = make_cases(args.full)
+    if args.filter is not None:
+        lstCases = [case for case in lstCases
+                    if args.filter.lower() in case["name"].lower()]
+    dctBaseline = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            dctBaseline = json.load(f)
+    
+    print("{:<52} {:>10} {:>10} {:>10} {:>8} {:>8}".format(
+        "case", "time [s]", "peak [MB]", "incr [MB]", "time x", "mem x"))
+    dctResults = {}
+    lstRegressions = []
+    for case in lstCases:
+        dctResult = run_case(case, args.repeat, args.timeout)
+        dctResults[case["name"]] = dctResult
+        timeRatio = memRatio = np.nan
+        if case["name"] in dctBaseline:
+            dctBase = dctBaseline[case["name"]]
+            timeRatio = dctResult["time"] / dctBase["time"]
+            memRatio = dctResult["peakRss"] / dctBase["peakRss"]
+            slower = not timeRatio <= 1 + args.tolerance \
+            and not dctResult["time"] - dctBase["time"] < MIN_TIME_DIFFERENCE
+            # failed cases are regressions too
+            if slower or not memRatio <= 1 + args.tolerance:
+                lstRegressions.append(case["name"])
+        print("{:<52} {:>10.4f} {:>10.1f} {:>10.1f} {:>8.2f} {:>8.2f}"
+              .format(case["name"], dctResult["time"],
+                      dctResult["peakRss"] / 2**20,
+                      dctResult["rssIncrease"] / 2**20, timeRatio,
+                      memRatio), flush=True)
+    
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(dctResults, f, indent=1)
+    if len(lstRegressions) > 0:
+        print()
+        print("Regressions (failed or more than {:.0%} slower or larger):"
+              .format(args.tolerance))
+        for strName in lstRegressions:
+            print("    " + strName)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 __version__ = '0.2.0'
 
 from .md_plot import MDplot
-from .load_examples import load_examples
\ No newline at end of file
+from .md_plot_stream import MDplot_stream
+from .md_plot_density import MDplot_density, density_table
+from .load_examples import load_examples
+from .md_plot_session import MDplotSession
\ No newline at end of file
@@ -1,8 +1,18 @@
-from .bimodal import bimodal
+from .bimodal import bimodal, bimodal_matrix
 from .optimal_no_bins import optimal_no_bins
 from .pareto_density_estimation import pareto_density_estimation
 from .pareto_radius import pareto_radius
 from .pretty import pretty
 from .robust_normalization import robust_normalization
 from .signed_log import signed_log
-from .stat_pde_density import stat_pde_density
\ No newline at end of file
+from .stat_pde_density import stat_pde_density
+from .column_statistics import column_statistics
+from .density_cache import DensityCache
+from .stream_summary import StreamSummary
+from .ragged_columns import RaggedColumns
+from .plot_summaries import boxplot_table, jitter_table, gaussian_table
+from .scaler import Scaler
+from .sampling import sample_positions, random_generator, seed_sequence, \
+                      spawn_generators
+from .phase_profiler import PhaseProfiler
+from .kernel_histogram import KernelHistogram
\ No newline at end of file
@@ -10,13 +10,210 @@ import numpy as np
 import matplotlib.pyplot as plt
 from pandas.api.types import is_numeric_dtype
 from scipy.signal import lfilter
-from scipy.stats.mstats import mquantiles
 from scipy.stats import norm
 
+# percentiles used for the quantiles and the corresponding normal quantiles
+PROBS = np.array([x / 100 for x in range(1,100)])
+PERCENT = np.arange(0.01, 1, 0.01)
+
+
+def quantiles_sorted(sortedData, nData, probs, alphap=0.5, betap=0.5):
+    """
+    Quantiles of presorted columns, identical to mquantiles(data, probs,
+    alphap, betap) per column but for all columns at once
+    
+    Args:
+        sortedData (array): 2D array, each column sorted ascending with nan
+                            values at the end
+        nData (array): number of non nan values per column
+        probs (array): probabilities of the quantiles
+        alphap (float): plotting positions parameter
+        betap (float): plotting positions parameter
+    
+    Returns:
+        2D array of quantiles (probabilities in rows, columns in columns),
+        nan for empty columns
+    """
+    nData = np.asarray(nData)
+    if len(sortedData) == 0:
+        return np.full((len(probs), len(nData)), np.nan)
+    m = alphap + probs * (1. - alphap - betap)
+    aleph = nData[np.newaxis, :] * probs[:, np.newaxis] + m[:, np.newaxis]
+    k = np.floor(np.clip(aleph, 1, np.maximum(nData - 1, 1))).astype(int)
+    gamma = np.clip(aleph - k, 0, 1)
+    lower = np.take_along_axis(sortedData, k - 1, axis=0)
+    upper = np.take_along_axis(sortedData, 
+                               np.minimum(k, len(sortedData) - 1), axis=0)
+    quantiles = (1. - gamma) * lower + gamma * upper
+    # single values are returned unchanged, no values give nan
+    quantiles[:, nData == 1] = sortedData[0, nData == 1]
+    quantiles[:, nData == 0] = np.nan
+    return quantiles
+
+
+def quantiles_partition(values, probs, alphap=0.5, betap=0.5):
+    """
+    Quantiles of one column, identical to mquantiles(values, probs, alphap,
+    betap) but only the order statistics next to the plotting positions are
+    selected with np.partition instead of sorting all values, O(n)
+    
+    Args:
+        values (array): one dimensional data without nan
+        probs (array): probabilities of the quantiles
+        alphap (float): plotting positions parameter
+        betap (float): plotting positions parameter
+    
+    Returns:
+        array of quantiles
+    """
+    probs = np.asarray(probs, dtype=float)
+    nData = len(values)
+    if nData == 0:
+        return np.full(len(probs), np.nan)
+    if nData == 1:
+        return np.full(len(probs), values[0], dtype=float)
+    # positions read by quantiles_sorted
+    aleph = nData * probs + alphap + probs * (1. - alphap - betap)
+    k = np.floor(np.clip(aleph, 1, nData - 1)).astype(int)
+    partitioned = np.partition(values, np.unique(np.r_[k - 1, k]))
+    return quantiles_sorted(partitioned[:, np.newaxis], [nData], probs, 
+                            alphap, betap)[:, 0]
+
+
+def longest_runs(runs):
+    """
+    Length of the longest run of True values in each column
+    
+    Args:
+        runs (array): 2D boolean array
+    
+    Returns:
+        array with the longest run length per column
+    """
+    nRows, nCols = runs.shape
+    # columns one after another, separated by a False value
+    padded = np.zeros((nCols, nRows + 1), dtype=np.int8)
+    padded[:, 1:] = runs.T
+    flat = np.append(padded.ravel(), 0)
+    changes = np.diff(flat)
+    starts = np.flatnonzero(changes == 1)
+    ends = np.flatnonzero(changes == -1)
+    maxRunLength = np.zeros(nCols, dtype=int)
+    np.maximum.at(maxRunLength, starts // (nRows + 1), ends - starts)
+    return maxRunLength
+
+
+def convex_concave(x, fx):
+    """
+    Estimate if a function is convex or concave
+    
+    Args:
+        x (array): x values of function
+        fx (array): correponding y values, 1D or 2D with one function per
+                    column
+    
+    Returns:
+        dictionary containing (one value per column of fx):
+            Kruemmung: (ProConvex-ProConcave)/n*100
+            ProConvex: (longest successive part where SecondDerivative>0)
+                                                                    /n *100
+            ProConcave: (longest successive part where SecondDerivative<0)
+                                                                    /n *100
+            SecondDerivative: finite and filtered approximation to second
+                              derivative of f(x)
+            ErsteAbleitung: finite and filtered approximation to first
+                            derivaive of f(x)
+            PosRuns: True where part of a convex run
+            NegRuns: True where part of a concave run
+    """
+    x = np.asarray(x, dtype=float)
+    fx = np.asarray(fx, dtype=float)
+    flat = fx.ndim == 1
+    if flat:
+        fx = fx[:, np.newaxis]
+    dx = np.diff(x)[:, np.newaxis]
+    
+    # constants
+    EPS = 1.5  # minimal Kruemmung > 0
+    
+    anz = len(x)
+    
+    ersteAbleitung = np.zeros(fx.shape)
+    ersteAbleitung[1:] = np.diff(fx, axis=0) / dx
+    windowSize = 13
+    ersteAbleitung = lfilter(np.repeat(1.0/windowSize, windowSize), 1,
+                             ersteAbleitung, axis=0)
+    
+    secondDerivative = np.zeros(fx.shape)
+    secondDerivative[1:] = np.diff(ersteAbleitung, axis=0) / dx
+    windowSize = 15
+    secondDerivative = lfilter(np.repeat(1.0/windowSize, windowSize), 1,
+                               secondDerivative, axis=0)
+    
+    posOrNeg = np.zeros(fx.shape)
+    posOrNeg[secondDerivative >  EPS] = 1
+    posOrNeg[secondDerivative < -1 * EPS] = -1
+    # NextIdentical is true if the next is on the same side
+    nextIdentical = np.ones(fx.shape, dtype=bool)
+    nextIdentical[:-1] = posOrNeg[:-1] == posOrNeg[1:]
+    posRuns = nextIdentical & (secondDerivative > EPS)
+    negRuns = nextIdentical & (secondDerivative < -1 * EPS)
+    
+    proConvex  = 100 * longest_runs(posRuns) / anz
+    proConcave = 100 * longest_runs(negRuns) / anz
+    kruemmung  = 100 * (proConvex - proConcave) / anz
+    
+    dctV = {"Kruemmung": kruemmung, "ProConvex": proConvex,
+            "ProConcave": proConcave, "SecondDerivative": secondDerivative,
+            "ErsteAbleitung": ersteAbleitung, "PosRuns": posRuns,
+            "NegRuns": negRuns}
+    if flat:
+        dctV = {key: value[..., 0] for key, value in dctV.items()}
+    return dctV
+
+
+def bimodal_matrix(data):
+    """
+    Estimation if the empirical distributions of the columns of a matrix
+    have two modes, see bimodal. All columns are scored at once.
+    
+    Args:
+        data (dataframe / 2D array): one variable per column, nan and inf
+                                     values are ignored
+    
+    Returns:
+        dataframe with one row per column containing Bimodal, ProConvex and
+        ProConcave
+    """
+    if not isinstance(data, pd.DataFrame):
+        try:
+            data = pd.DataFrame(data)
+        except:
+            raise Exception("Data cannot be converted into pandas dataframe")
+    if not all([is_numeric_dtype(data[strCol]) for strCol in data.columns]):
+        raise Exception("Data is not numeric!")
+    
+    values = data.values.astype(float)
+    values[~np.isfinite(values)] = np.nan
+    # nan values are sorted to the end
+    values = np.sort(values, axis=0)
+    nData = (~np.isnan(values)).sum(axis=0)
+    
+    fx = quantiles_sorted(values, nData, PROBS)
+    x = norm.ppf(PERCENT)
+    dctV = convex_concave(x, fx)
+    bimodal = norm.cdf(np.minimum(dctV["ProConvex"], dctV["ProConcave"]),
+                       7, 3)
+    
+    return pd.DataFrame({"Bimodal": bimodal, "ProConvex": dctV["ProConvex"],
+                         "ProConcave": dctV["ProConcave"]},
+                        index=data.columns)
+
+
 def bimodal(data, plotIt=False, narm=True):
     """
     Estimation if empirical data distribution has two modes
-    Reimplementation of R (Michael Thrun) which is reimplemented from matlab 
+    Reimplementation of R (Michael Thrun) which is reimplemented from matlab
     of ALU 2006
     
     Args:
@@ -27,102 +224,11 @@ def bimodal(data, plotIt=False, narm=True):
     Returns:
         dictionary containing:
             Bimodal: in [0,1] indication (probability) whether Data is bimodal
-            ProConvex: (longest successive part where SecondDerivative>0) / n 
+            ProConvex: (longest successive part where SecondDerivative>0) / n
                                                                         * 100
-            ProConcave: (longest successive part where SecondDerivative<0) / n 
+            ProConcave: (longest successive part where SecondDerivative<0) / n
                                                                         * 100
     """
-    
-    def convex_concave(x, fx, plotIt=False):
-        """
-        Estimate if a function is convex or concave
-        
-        Args:
-            x (series / array): x values of function
-            fx (series / array): correponding y values
-            plotIt (boolean): plot the function with convex & concave parts
-        
-        Returns:
-            dictionary containing:
-                Kruemmung: (ProConvex-ProConcave)/n*100
-                ProConvex: (longest successive part where SecondDerivative>0)
-                                                                        /n *100
-                ProConcave: (longest successive part where SecondDerivative<0)
-                                                                        /n *100
-                SecondDerivative: finite and filtered approximation to second 
-                                  derivative of f(x)
-                ErsteAbleitung: finite and filtered approximation to first 
-                                derivaive of f(x)
-        """
-        # converting to series
-        if not isinstance(x, pd.Series):
-            x = pd.Series(x)
-        if not isinstance(fx, pd.Series):
-            fx = pd.Series(fx)
-        
-        # constants
-        EPS = 1.5  # minimal Kruemmung > 0
-        
-        anz = len(x)
-        
-        ersteAbleitung = fx.diff().dropna() / x.diff().dropna()
-        ersteAbleitung = pd.concat([pd.Series([0]), ersteAbleitung])
-        windowSize = 13
-        ersteAbleitung = pd.Series(lfilter(np.repeat(1.0/windowSize, 
-                                                     windowSize), 
-                                           1, ersteAbleitung))
-        
-        secondDerivative = ersteAbleitung.diff().dropna() / x.diff().dropna()
-        
-        secondDerivative = pd.concat([pd.Series([0]), secondDerivative])
-        windowSize = 15
-        secondDerivative = pd.Series(lfilter(np.repeat(1.0/windowSize, 
-                                                       windowSize), 
-                                             1, secondDerivative))
-        
-        Next = pd.concat([pd.Series([x for x in range(1, anz)]), pd.Series([anz-1])])
-        posOrNeg = x * 0
-        posOrNeg[secondDerivative >  EPS] = 1
-        posOrNeg[secondDerivative < -1 * EPS] = -1
-        # NextIdentical is true if the next is on the same side
-        nextIdentical = posOrNeg == posOrNeg[Next].reset_index(drop=True)
-        posRuns = nextIdentical & (secondDerivative > EPS)
-        negRuns =  nextIdentical & (secondDerivative < -1 * EPS)
-        
-        maxPosRunLength = 0
-        posRunLength = 0
-        maxNegRunLength = 0
-        negRunLength = 0
-        for i in list(range(anz)):
-            if posRuns[i] == True:
-                posRunLength += 1
-            else:
-                posRunLength = 0
-            if negRuns[i] == True:
-                negRunLength += 1
-            else:
-                negRunLength = 0
-            maxPosRunLength = max([maxPosRunLength, posRunLength])
-            maxNegRunLength = max([maxNegRunLength, negRunLength])
-        
-        proConvex  = 100 * maxPosRunLength / anz
-        proConcave = 100 * maxNegRunLength / anz
-        kruemmung  = 100 * (proConvex - proConcave) / anz
-        
-        if plotIt == True:
-            plt.plot(x, fx, c='blue')
-            plt.xlabel('x \n green = convex, red = concave')
-            plt.ylabel('f(x)')
-            plt.scatter(x[posRuns == True], fx[posRuns == True], 
-                        c='green', s=20)
-            plt.scatter(x[negRuns == True], fx[negRuns == True], 
-                        c='red', s=20)
-        
-        return {"Kruemmung": kruemmung, "ProConvex": proConvex, 
-                "ProConcave": proConcave, "SecondDerivative": secondDerivative,
-                "ErsteAbleitung": ersteAbleitung}
-    
-    
     if not isinstance(data, pd.Series):
         try:
             data = pd.Series(data)
@@ -131,20 +237,33 @@ def bimodal(data, plotIt=False, narm=True):
     if not is_numeric_dtype(data):
         raise Exception("Data is not numeric!")
     
-    data = data.apply(lambda x: np.nan if abs(x) == np.inf else x).dropna()
+    values = data.values.astype(float)
+    values = np.sort(values[np.isfinite(values)])
     
-    fx = pd.Series(mquantiles(data, [x / 100 for x in range(1,100)], 
-                                     alphap=0.5, betap=0.5)).dropna()
-    percent = np.arange(0.01, 1, 0.01)
-    x = norm.ppf(percent)
-    dctV = convex_concave(x, fx, plotIt)
+    if len(values) == 0:
+        # without finite values the quantiles are nan and contain no runs
+        fx = np.full(len(PROBS), np.nan)
+    else:
+        fx = quantiles_sorted(values[:, np.newaxis], [len(values)], 
+                              PROBS)[:, 0]
+    x = norm.ppf(PERCENT)
+    dctV = convex_concave(x, fx)
+    dctV["ProConvex"] = float(dctV["ProConvex"])
+    dctV["ProConcave"] = float(dctV["ProConcave"])
     bimodal = norm.cdf(min(dctV["ProConvex"], dctV["ProConcave"]), 7, 3)
     
     if plotIt == True:
+        posRuns = dctV["PosRuns"]
+        negRuns = dctV["NegRuns"]
+        plt.plot(x, fx, c='blue')
+        plt.xlabel('x \n green = convex, red = concave')
+        plt.ylabel('f(x)')
+        plt.scatter(x[posRuns], fx[posRuns], c='green', s=20)
+        plt.scatter(x[negRuns], fx[negRuns], c='red', s=20)
         plt.title('Bimodal = ' + str(round(bimodal, 3) * 100) \
                   + " | ProConvex = " + str(round(dctV["ProConvex"], 2)) \
                   + " | ProConcave = " + str(round(dctV["ProConcave"], 2)))
         plt.show()
     
-    return {"Bimodal": bimodal, "ProConvex": dctV["ProConvex"], 
-            "ProConcave": dctV["ProConcave"]}
\ No newline at end of file
+    return {"Bimodal": bimodal, "ProConvex": dctV["ProConvex"],
+            "ProConcave": dctV["ProConcave"]}
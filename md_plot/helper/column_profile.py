@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import numpy as np
+from .bimodal import quantiles_sorted
+
+# probabilities of the quantiles of the profile (robust minimum and maximum
+# and quartiles as used by the statistics of MDplot)
+QUANTILE_PROBS = [0.001, 0.25, 0.75, 0.999]
+
+
+def quantile_columns(probs=QUANTILE_PROBS):
+    """ names of the quantile columns of column_profile """
+    return ["q" + str(prob) for prob in probs]
+
+
+def count_unique(values, MaxUnique=None):
+    """
+    Number of unique values, counting stops as soon as more than MaxUnique
+    unique values are found. The values are merged block by block (with
+    growing blocks) into the sorted unique values found so far, thus columns
+    with many unique values stop after the first block and exact counts are
+    only computed for columns with few unique values.
+    
+    Args:
+        values (array): values without nan
+        MaxUnique (int): threshold of the count, None counts exactly
+    
+    Returns:
+        number of unique values (a lower bound larger than MaxUnique if 
+        counting stopped) and True if counting stopped early
+    """
+    if MaxUnique is None:
+        return len(np.unique(values)), False
+    unique = np.array([], dtype=values.dtype)
+    start = 0
+    blockSize = max(8 * (MaxUnique + 1), 1024)
+    while start < len(values):
+        unique = np.union1d(unique, values[start:start + blockSize])
+        if len(unique) > MaxUnique:
+            return len(unique), start + blockSize < len(values)
+        start += blockSize
+        blockSize *= 2
+    return len(unique), False
+
+
+def column_profile(Data, probs=QUANTILE_PROBS, Statistics=True, 
+                   MaxUnique=None):
+    """
+    Counts and summary statistics of all columns of a dataframe, computed
+    with one sort of the finite values per column instead of separate scans
+    for each statistic
+    
+    Args:
+        Data (dataframe): numeric dataframe, each column is one variable
+        probs (list): probabilities of the quantiles, computed like
+                      mquantiles(alphap=0.5, betap=0.5)
+        Statistics (bool): if False only the counts are computed, the
+                           values are not sorted and the statistics are nan
+        MaxUnique (int): if given and Statistics is False, unique values
+                         are only counted until more than MaxUnique are 
+                         found (see count_unique), e.g. for comparisons 
+                         with UniqueValuesThreshold
+    
+    Returns:
+        dataframe with one row per column containing n (number of rows),
+        nFinite, nNan, nInf, nUnique (number of unique non nan values,
+        infinite values included, lower bound if uniqueCapped), 
+        uniqueCapped, min, max, median, std and one column per quantile 
+        (see quantile_columns). Statistics of the values are computed on 
+        the finite values and are nan if there are none.
+    """
+    probs = np.asarray(probs, dtype=float)
+    lstQuantiles = quantile_columns(probs)
+    lstRows = []
+    for strCol in Data.columns:
+        values = Data[strCol].to_numpy(dtype=np.float64)
+        isNan = np.isnan(values)
+        isFinite = np.isfinite(values)
+        nFinite = int(isFinite.sum())
+        nNan = int(isNan.sum())
+        nInf = len(values) - nFinite - nNan
+        
+        dctRow = {"n": len(values), "nFinite": nFinite, "nNan": nNan,
+                  "nInf": nInf}
+        if Statistics == False:
+            dctRow["nUnique"], dctRow["uniqueCapped"] = count_unique(
+                values[~isNan], MaxUnique)
+            lstRows.append(dctRow)
+            continue
+        
+        finite = values[isFinite]
+        if nFinite > 1:
+            dctRow["std"] = finite.std(ddof=1)
+        else:
+            dctRow["std"] = np.nan
+        
+        finite.sort()
+        nUnique = np.count_nonzero(finite[1:] != finite[:-1]) \
+        + int(nFinite > 0)
+        if nInf > 0:
+            nUnique += int(np.any(values == np.inf)) \
+            + int(np.any(values == -np.inf))
+        dctRow["nUnique"] = nUnique
+        dctRow["uniqueCapped"] = False
+        
+        if nFinite > 0:
+            dctRow["min"] = finite[0]
+            dctRow["max"] = finite[-1]
+            dctRow["median"] = (finite[(nFinite - 1) // 2]
+                                + finite[nFinite // 2]) / 2
+            quantiles = quantiles_sorted(finite[:, np.newaxis], [nFinite],
+                                         probs)[:, 0]
+        else:
+            dctRow["min"] = dctRow["max"] = dctRow["median"] = np.nan
+            quantiles = np.full(len(probs), np.nan)
+        dctRow.update(zip(lstQuantiles, quantiles))
+        lstRows.append(dctRow)
+    
+    dfProfile = pd.DataFrame(lstRows, index=list(Data.columns),
+                             columns=["n", "nFinite", "nNan", "nInf",
+                                      "nUnique", "uniqueCapped", "min", 
+                                      "max", "median", "std"] 
+                             + lstQuantiles)
+    dfProfile.index.name = "variable"
+    return dfProfile
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import warnings
+from time import perf_counter
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from scipy.stats import norm, trim_mean, skewtest, kstest
+from .bimodal import bimodal
+from .column_profile import column_profile, quantile_columns
+from .sampling import sample_positions, seed_sequence, seed_key
+from ..unidip import dip
+
+logger = logging.getLogger("md_plot")
+
+
+def draws_analysis_sample(nPerVar, nCases):
+    """ True if analysis_sample draws a sample of the column """
+    return nCases > 45000 and nPerVar > 8
+
+
+def analysis_sample(data, nPerVar, nCases, dctAnalysis, rng):
+    """
+    Sample of a column used for statistical testing and ordering. Tests do 
+    not work with too many cases, thus 45000 rows are drawn if there are 
+    more cases. The drawn positions are kept in dctAnalysis, so all phases 
+    of MDplot use the same sample.
+    
+    Args:
+        data (series): values of the column
+        nPerVar (int): number of finite values of the column
+        nCases (int): number of cases of the data
+        dctAnalysis (dict): analysis of the column, SampleIndex is added
+        rng (Generator / None): random generator for drawing the sample, 
+                                see sample_positions
+    
+    Returns:
+        series with the sample (or all values)
+    """
+    if "SampleIndex" not in dctAnalysis:
+        if draws_analysis_sample(nPerVar, nCases):
+            dctAnalysis["SampleIndex"] = sample_positions(len(data), 45000, 
+                                                          rng)
+        else:
+            dctAnalysis["SampleIndex"] = None
+    if dctAnalysis["SampleIndex"] is None:
+        return data
+    return data.iloc[dctAnalysis["SampleIndex"]]
+
+
+def _column_statistics(strCol, values, nPerVar, nUniquePerVar, nCases,
+                       QuantityThreshold, UniqueValuesThreshold, seed, 
+                       dctAnalysis, quantiles, std):
+    """
+    Statistics of a single column, runs inside of the workers
+    
+    Args:
+        strCol (str): name of the column
+        values (array): values of the column (may contain nan)
+        nPerVar (int): number of finite values of the column
+        nUniquePerVar (int): number of unique values of the column
+        nCases (int): number of cases of the data
+        QuantityThreshold (int): minimal number of rows
+        UniqueValuesThreshold (int): minimal number of unique values
+        seed (SeedSequence): seed of the random generator of this column
+        dctAnalysis (dict): results of earlier analysis of this column 
+                            (SampleIndex, Quantiles, Dip, Bimodal), which 
+                            are reused and completed
+        quantiles (array): quantiles of the finite values at QUANTILE_PROBS
+        std (float): standard deviation of the finite values
+    
+    Returns:
+        dictionary containing the statistics of the column and the 
+        completed analysis dictionary
+    """
+    rng = np.random.default_rng(seed)
+    data = pd.Series(values)
+    dctAnalysis = dict(dctAnalysis)
+    
+    factor = abs(norm.ppf(0.25)) + abs(norm.ppf(0.75))
+    if "Quantiles" not in dctAnalysis:
+        dctAnalysis["Quantiles"] = np.asarray(quantiles, dtype=float)
+    minMax = dctAnalysis["Quantiles"][[0, 3]]
+    quartile = dctAnalysis["Quantiles"][[1, 2]]
+    
+    shat = min([std, (quartile[1] - quartile[0]) / factor])
+    mhat = trim_mean(data.dropna(), 0.1)
+    
+    if nPerVar < 8 or not nUniquePerVar > UniqueValuesThreshold:
+        if nPerVar < 8:
+            warnings.warn("Sample of finite values to small to calculate "
+                          "agostino.test or dip.test for " + str(strCol))
+        else:
+            logger.warning("Not enough unique values for statistical testing, "
+                           "thus output of testing is ignored.")
+        nonunimodal = 1
+        skewed = 1
+        isuniformdist = 0
+        bimodalprob = 0
+    else:
+        vec = analysis_sample(data, nPerVar, nCases, dctAnalysis, rng)
+        if "Dip" not in dctAnalysis:
+            dctAnalysis["Dip"] = dip.diptst(vec.dropna())
+        nonunimodal = dctAnalysis["Dip"][1]
+        skewed = skewtest(vec)[1]
+        args = (minMax[0], minMax[1] - minMax[0])
+        isuniformdist = kstest(vec, "uniform", args)[1]
+        if "Bimodal" not in dctAnalysis:
+            dctAnalysis["Bimodal"] = bimodal(vec)["Bimodal"]
+        bimodalprob = dctAnalysis["Bimodal"]
+    
+    isgaussian = isuniformdist < 0.05 and nonunimodal > 0.05 \
+    and skewed > 0.05 and bimodalprob < 0.05 \
+    and nPerVar > QuantityThreshold \
+    and nUniquePerVar > UniqueValuesThreshold
+    
+    return {"shat": shat, "mhat": mhat, "nonunimodal": nonunimodal,
+            "skewed": skewed, "isuniformdist": isuniformdist,
+            "bimodalprob": bimodalprob, "isgaussian": isgaussian}, \
+           dctAnalysis
+
+
+def _timed_column_statistics(*args):
+    """ _column_statistics and its wall time, runs inside of the workers """
+    start = perf_counter()
+    result = _column_statistics(*args)
+    return result, perf_counter() - start
+
+
+def column_statistics(Data, nPerVar=None, nUniquePerVar=None, nCases=None,
+                      QuantityThreshold=40, UniqueValuesThreshold=12,
+                      n_jobs=1, backend="process", random_state=None, 
+                      Analysis=None, Cache=None, Profile=None, 
+                      Profiler=None):
+    """
+    Robust gaussian parameters and statistical tests (dip test, skewness
+    test, Kolmogorov-Smirnov test against uniform distribution and bimodal)
+    for each column of a dataframe
+    
+    Args:
+        Data (dataframe): dataframe containing data, each column is one
+                          variable, infinite values have to be replaced by nan
+        nPerVar (series): number of non nan values per column, taken from 
+                          Profile if None
+        nUniquePerVar (series): number of unique values per column, taken 
+                                from Profile if None
+        nCases (int): number of cases, decides if the tests run on a sample
+                      of 45000 rows, number of rows of Data if None
+        QuantityThreshold (int): minimal number of rows
+        UniqueValuesThreshold (int): minimal number of unique values per
+                                     column
+        n_jobs (int): number of workers, -1 uses all cores, 1 runs serial
+        backend (str): 'process' or 'thread' pool
+        random_state (None / int / SeedSequence / Generator): seed for the 
+                     random numbers, each column gets its own child seed, 
+                     thus results do not depend on n_jobs. If None the seed
+                     is drawn from numpy's global random state.
+        Analysis (dict): per call cache of the analysis of each column 
+                         (dictionary of dictionaries keyed by column). 
+                         Existing results (SampleIndex, Quantiles, Dip, 
+                         Bimodal) are reused, new ones are added, so later 
+                         phases like the ordering can read them.
+        Cache (DensityCache): cache shared across calls, statistics and 
+                              analysis of columns with identical values and 
+                              parameters are taken from it. Tests of 
+                              sampled columns (more than 45000 cases) 
+                              depend on the seed of the column, thus they 
+                              are only reused for the same random_state.
+        Profile (dataframe): column_profile of Data, computed if None
+        Profiler (PhaseProfiler): records the wall time of each column 
+                                  (phase "Statistics", 0 for cached columns)
+    
+    Returns:
+        dataframe with one row per column containing shat, mhat, nonunimodal,
+        skewed, isuniformdist, bimodalprob, isgaussian and effectStrength
+    """
+    lstCols = list(Data.columns)
+    if Profile is None:
+        Profile = column_profile(Data)
+    if nPerVar is None:
+        nPerVar = Profile["n"] - Profile["nNan"]
+    if nUniquePerVar is None:
+        nUniquePerVar = Profile["nUnique"]
+    quantiles = Profile[quantile_columns()]
+    if nCases is None:
+        nCases = Data.shape[0]
+    
+    lstSeeds = seed_sequence(random_state).spawn(len(lstCols))
+    if Analysis is None:
+        Analysis = {}
+    
+    dctResults = {}
+    dctKeys = {}
+    if Cache is not None:
+        for strCol, seed in zip(lstCols, lstSeeds):
+            if draws_analysis_sample(nPerVar[strCol], nCases):
+                seedCol = seed_key(seed)
+            else:
+                seedCol = None
+            dctKeys[strCol] = Cache.make_key(
+                Data[strCol].values, "column_statistics", 
+                int(nPerVar[strCol]), int(nUniquePerVar[strCol]), 
+                int(nCases), QuantityThreshold, UniqueValuesThreshold, 
+                seedCol)
+            cached = Cache.get(dctKeys[strCol])
+            if cached is not None:
+                dctResults[strCol] = cached
+    
+    lstArgs = [(strCol, Data[strCol].values, nPerVar[strCol],
+                nUniquePerVar[strCol], nCases, QuantityThreshold,
+                UniqueValuesThreshold, seed, Analysis.get(strCol, {}),
+                quantiles.loc[strCol].values, Profile.loc[strCol, "std"])
+               for strCol, seed in zip(lstCols, lstSeeds)
+               if strCol not in dctResults]
+    
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs <= 1 or len(lstArgs) <= 1:
+        lstComputed = [_timed_column_statistics(*args) for args in lstArgs]
+    else:
+        if backend == "process":
+            Executor = ProcessPoolExecutor
+        elif backend == "thread":
+            Executor = ThreadPoolExecutor
+        else:
+            raise Exception("backend has to be 'process' or 'thread'")
+        with Executor(max_workers=min(n_jobs, len(lstArgs))) as executor:
+            lstComputed = list(executor.map(_timed_column_statistics,
+                                            *zip(*lstArgs)))
+    
+    dctSeconds = {}
+    for args, (result, seconds) in zip(lstArgs, lstComputed):
+        dctResults[args[0]] = result
+        dctSeconds[args[0]] = seconds
+        if Cache is not None:
+            Cache.put(dctKeys[args[0]], result)
+    if Profiler is not None:
+        for strCol in lstCols:
+            Profiler.add("Statistics", strCol, dctSeconds.get(strCol, 0.0), 
+                         int(nPerVar[strCol]))
+    lstResults = [dctResults[strCol] for strCol in lstCols]
+    
+    for strCol, (_, dctAnalysis) in zip(lstCols, lstResults):
+        Analysis[strCol] = dctAnalysis
+    
+    dfStats = pd.DataFrame([dctStats for dctStats, _ in lstResults], 
+                           index=lstCols,
+                           columns=["shat", "mhat", "nonunimodal", "skewed",
+                                    "isuniformdist", "bimodalprob",
+                                    "isgaussian"])
+    dfStats.index.name = "variable"
+    
+    nonunimodal = dfStats["nonunimodal"].replace(0, 0.0000000001)
+    skewed = dfStats["skewed"].replace(0, 0.0000000001)
+    dfStats["effectStrength"] = (-10 * np.log(skewed)
+                                 - 10 * np.log(nonunimodal)) / 2
+    return dfStats
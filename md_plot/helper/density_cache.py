@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import hashlib
+import threading
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+
+
+def _size_of(value):
+    """
+    Approximate memory size of a cached value in bytes
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum([_size_of(x)
+                                           for x in value.values()])
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum([_size_of(x) for x in value])
+    return sys.getsizeof(value)
+
+
+def _copy_of(value):
+    """
+    Copy of a cached value (dataframes, arrays and the containers of them),
+    thus callers never share or change the cached objects
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy_of(x) for k, x in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_copy_of(x) for x in value)
+    return value
+
+
+class DensityCache:
+    """
+    Least recently used cache for densities and column statistics of
+    MDplot, shared across calls. Entries are keyed by a hash of the data
+    buffer of a column and the parameters of the computation, thus
+    restyling a plot of the same data (colours, BoxPlot, Ordering, ...)
+    skips all density estimation and statistical testing.
+    
+    Args:
+        maxBytes (int): maximal memory size of all entries, least recently
+                        used entries are evicted above it
+    
+    Attributes:
+        hits (int): number of lookups found in the cache
+        misses (int): number of lookups not found in the cache
+        evictions (int): number of evicted entries
+    
+    Usage:
+        cache = DensityCache()
+        MDplot(data, Cache=cache)
+        MDplot(data, Cache=cache, BoxPlot=True)  # no density computation
+        cache.stats()
+    """
+    
+    def __init__(self, maxBytes=256 * 1024**2):
+        self.maxBytes = maxBytes
+        self.nBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    # plotnine deep copies plots and layer parameters, all copies have to
+    # share one cache
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    @staticmethod
+    def make_key(values, *params):
+        """
+        Hash of a data buffer and the parameters of the computation
+        
+        Args:
+            values (array / series): data of one column
+            params: parameters which change the result
+        
+        Returns:
+            string key
+        """
+        values = np.ascontiguousarray(np.asarray(values))
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(str((values.dtype.str, values.shape, params)).encode())
+        hasher.update(values.view(np.uint8).data)
+        return hasher.hexdigest()
+    
+    def get(self, key):
+        """
+        Copy of the cached value of key or None, counts hits and misses
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = self._entries[key][0]
+            else:
+                self.misses += 1
+                return None
+        return _copy_of(value)
+    
+    def put(self, key, value):
+        """
+        Stores a copy of value under key and evicts least recently used 
+        entries if the cache exceeds maxBytes
+        """
+        value = _copy_of(value)
+        nBytes = _size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self.nBytes -= self._entries.pop(key)[1]
+            if nBytes > self.maxBytes:
+                return
+            self._entries[key] = (value, nBytes)
+            self.nBytes += nBytes
+            while self.nBytes > self.maxBytes:
+                _, (_, nEvicted) = self._entries.popitem(last=False)
+                self.nBytes -= nEvicted
+                self.evictions += 1
+    
+    def clear(self):
+        """
+        Removes all entries, counters are kept
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nBytes = 0
+    
+    def stats(self):
+        """
+        Counters of the cache for monitoring
+        
+        Returns:
+            dictionary containing hits, misses, evictions, entries, bytes
+            and maxBytes
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions,
+                    "entries": len(self._entries), "bytes": self.nBytes,
+                    "maxBytes": self.maxBytes}
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+# cache used by MDplot(..., Cache=True)
+DEFAULT_CACHE = DensityCache()
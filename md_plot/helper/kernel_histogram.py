@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from .pretty import nice_step
+
+
+def binned_kernel_counts(centers, counts, kernels, paretoRadius, minData,
+                         maxData):
+    """
+    Number of values inside [kernel - paretoRadius, kernel + paretoRadius]
+    for all kernels, computed from binned values: each bin counts as all of
+    its values at its center. The values near the edges are mirrored at
+    minData and maxData as in pareto_density_estimation.
+    
+    If each value is moved by at most d to the center of its bin, a kernel
+    count differs from the exact count only by values closer than d to the
+    bounds of the window of the kernel.
+    
+    Args:
+        centers (array): ascending centers of the bins
+        counts (array): number of values of each bin
+        kernels (array): ascending kernels
+        paretoRadius (float): radius of the windows
+        minData (float): minimum of the values (lower mirror)
+        maxData (float): maximum of the values (upper mirror)
+    
+    Returns:
+        array with the count of each kernel
+    """
+    used = counts > 0
+    centers = np.clip(centers[used], minData, maxData)
+    counts = counts[used]
+    
+    # the mirrored bins lie below minData and above maxData, thus the
+    # concatenation stays sorted
+    low = centers < minData + paretoRadius
+    up = centers > maxData - paretoRadius
+    position = np.concatenate([(2 * minData - centers[low])[::-1], centers,
+                               (2 * maxData - centers[up])[::-1]])
+    weight = np.concatenate([counts[low][::-1], counts, counts[up][::-1]])
+    cumulative = np.concatenate([[0], np.cumsum(weight)])
+    
+    lb = np.searchsorted(position, kernels - paretoRadius, side="left")
+    ub = np.searchsorted(position, kernels + paretoRadius, side="right")
+    return cumulative[ub] - cumulative[lb]
+
+
+class KernelHistogram:
+    """
+    Histogram of the values of one column on a fine grid of bins, which is
+    updated batch by batch at a cost proportional to the batch. Bin i is
+    centered at i * step and covers [(i - 1/2) * step, (i + 1/2) * step),
+    thus the grid is aligned with round values like the breaks of pretty
+    and round data (e.g. integers) keeps its exact values. The grid grows 
+    with the range of the
+    values, if it exceeds MaxBins bins, neighbouring bins are merged (the
+    step is doubled).
+    
+    The first batch sets step to a round value of about 2 * range / MaxBins
+    (nice_step rounds by a factor of at most 1.8), thus after any number of
+    batches the grid has at least MaxBins / 4 bins between the minimum and
+    maximum. Each value is moved by at most step / 2 to the center of its
+    bin, after the grid was coarsened by less than step.
+    
+    Args:
+        MaxBins (int): maximal number of bins
+    
+    Usage:
+        hist = KernelHistogram()
+        for batch in batches:
+            hist.update(batch)
+        binned_kernel_counts(hist.centers(), hist.counts, kernels,
+                             paretoRadius, minData, maxData)
+    """
+    
+    def __init__(self, MaxBins=2**16):
+        self.MaxBins = MaxBins
+        self.step = None
+        self.origin = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+    
+    def centers(self):
+        """ centers of the bins """
+        return (float(self.origin) + np.arange(len(self.counts), 
+                                               dtype=float)) * self.step
+    
+    def _bin(self, value):
+        """ global index of the bin of a single value """
+        # python int, values of a huge magnitude and a tiny range exceed 
+        # the range of int64
+        return int(np.floor(value / self.step + 0.5))
+    
+    def _index(self, values):
+        """ index of the bins of values relative to origin """
+        index = np.floor(values / self.step + 0.5) - float(self.origin)
+        # values on the edges of the grid may round into the next bin, the
+        # clipping before the cast keeps the index inside int64
+        np.clip(index, 0, len(self.counts) - 1, out=index)
+        return index.astype(np.int64)
+    
+    def _coarsen(self):
+        """ merges pairs of neighbouring bins, doubles the step """
+        # bins 2j - 1 and 2j lie inside the new bin j, relative to the new
+        # origin (origin + 1) // 2
+        parity = self.origin % 2
+        index = (np.arange(len(self.counts)) + parity + 1) // 2 - parity
+        self.counts = np.bincount(index, weights=self.counts)\
+        .astype(np.int64)
+        self.origin = (self.origin + 1) // 2
+        self.step = self.step * 2
+    
+    def update(self, values):
+        """
+        Adds values to the histogram
+        
+        Args:
+            values (array): finite values
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        minData = values.min()
+        maxData = values.max()
+        if self.step is None:
+            span = maxData - minData
+            if span == 0:
+                span = abs(minData) if minData != 0 else 1.0
+            self.step = nice_step(2 * span / self.MaxBins)
+            self.origin = self._bin(minData)
+        
+        lower = min(self.origin, self._bin(minData))
+        upper = max(self.origin + len(self.counts), self._bin(maxData) + 1)
+        while upper - lower > self.MaxBins:
+            self._coarsen()
+            lower = min(self.origin, self._bin(minData))
+            upper = max(self.origin + len(self.counts), 
+                        self._bin(maxData) + 1)
+        
+        if lower < self.origin or upper > self.origin + len(self.counts):
+            counts = np.zeros(upper - lower, dtype=np.int64)
+            start = self.origin - lower
+            counts[start:start + len(self.counts)] = self.counts
+            self.counts = counts
+            self.origin = lower
+        index = self._index(values)
+        self.counts += np.bincount(index, minlength=len(self.counts))
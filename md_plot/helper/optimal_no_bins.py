@@ -7,8 +7,8 @@ Created on Sun Jun 16 10:59:45 2019
 
 import pandas as pd
 from pandas.api.types import is_numeric_dtype
-from scipy.stats.mstats import mquantiles
 from math import ceil
+from .bimodal import quantiles_partition
 
 def optimal_no_bins(data):
     """
@@ -35,13 +35,30 @@ def optimal_no_bins(data):
         return 0
     
     sigma = data.std()
-    p = mquantiles(data, [0.25, 0.75], alphap=1/3, betap=1/3)
-    interquartilRange = p[1] - p[0]
+    p = quantiles_partition(data.values, [0.25, 0.75], alphap=1/3, 
+                            betap=1/3)
+    return optimal_no_bins_summary(nData, sigma, p[1] - p[0], 
+                                   data.max() - data.min())
+
+def optimal_no_bins_summary(nData, sigma, interquartilRange, dataRange):
+    """
+    Optimal number of bins of optimal_no_bins from summary statistics, e.g.
+    of data which is not held in memory
+    
+    Args:
+        nData (int): number of values
+        sigma (float): standard deviation
+        interquartilRange (float): interquartile range
+        dataRange (float): maximum - minimum
+    
+    Returns:
+        optimal number of bins for a histogram
+    """
     sigmaSir = min(sigma, interquartilRange / 1.349)
     optBinWidth = (3.49 * sigmaSir) / (nData**(1/3))
     
     if optBinWidth > 0:
-        optNrOfBins = max(ceil((data.max() - data.min()) / optBinWidth), 10)
+        optNrOfBins = max(ceil(dataRange / optBinWidth), 10)
     else:
         optNrOfBins = 10
     
@@ -12,9 +12,45 @@ from pandas.api.types import is_numeric_dtype
 from .pareto_radius import pareto_radius
 from .optimal_no_bins import optimal_no_bins
 from .pretty import pretty
+from .kernel_histogram import KernelHistogram, binned_kernel_counts
+from .column_profile import count_unique
+
+# number of values above which the kernels are counted on binned data
+BINNED_THRESHOLD = 1000000
+# maximal number of bins of the binned data (at least BINNED_BINS / 4 bins 
+# between minimum and maximum)
+BINNED_BINS = 2**18
+
+def pde_kernels(minData, maxData, nBins, minAnzKernels=100):
+    """
+    Default kernels of pareto_density_estimation: the midpoints of the 
+    pretty breaks of the range of the data
+    
+    Args:
+        minData (float): minimum of the data
+        maxData (float): maximum of the data
+        nBins (int): optimal number of bins of the data (optimal_no_bins)
+        minAnzKernels (int): minimal number of kernels
+    
+    Returns:
+        array of kernels
+    """
+    nBins = max(minAnzKernels , nBins)
+    
+    if nBins > 100:
+        if nBins > 10000:
+            nBins = 10000
+            warnings.warn("Too many bins estimated, try to transform or "
+                          "sample the data")
+        else:
+            nBins = nBins * 3 + 1
+    
+    breaks = pretty(minData, maxData, nBins)
+    return 0.5 * (breaks[1:] + breaks[:-1])
 
 def pareto_density_estimation(data, paretoRadius=None, kernels=None, 
-                              minAnzKernels=100):
+                              minAnzKernels=100, random_state=None, 
+                              binned=None, binnedThreshold=None):
     """
     Estimates the Pareto Density for a one dimensional distibution
     this is the best density estimation to judge Gaussian Mixtures of the Data
@@ -26,6 +62,21 @@ def pareto_density_estimation(data, paretoRadius=None, kernels=None,
         kernels (list): Data values at which ParetoDensity is measured, 
                         use pyplot.plot(kernels, paretoDensity) for display
         minAnzKernels (int): minimal number of kernels
+        random_state (None / int / Generator): seed of the sample of 
+                                               pareto_radius
+        binned (bool): count the values of the kernels on binned data, 
+                       None decides by binnedThreshold. The values are 
+                       binned with np.bincount on a grid of at least 
+                       BINNED_BINS / 4 bins between minimum and maximum, 
+                       aligned with the pretty breaks, thus each value is 
+                       moved by at most step / 2 <= 2 * (max - min) / 
+                       BINNED_BINS. The count of a kernel only differs from
+                       the exact count by values closer than step / 2 to 
+                       the bounds of its window, for smooth densities the 
+                       relative error is about step / (2 * paretoRadius).
+        binnedThreshold (int): number of values above which binned counting
+                               is used if binned is None, BINNED_THRESHOLD 
+                               if None
     
     Returns:
         A dictionary containing the kernels, paretoDensity and the paretoRadius
@@ -38,14 +89,16 @@ def pareto_density_estimation(data, paretoRadius=None, kernels=None,
     if not is_numeric_dtype(data):
         raise Exception("Data is not numeric!")
     
-    data = data.apply(lambda x: np.nan if abs(x) == np.inf else x).dropna()
-    values = data.unique()
+    data = data[np.isfinite(data)]
+    # unique values are only counted until 5 are found
+    nUnique, _ = count_unique(data.values, MaxUnique=4)
     
-    if (len(values) > 2) & (len(values) < 5):
+    if (nUnique > 2) & (nUnique < 5):
         warnings.warn("Less than 5 unqiue values for density estimation. "
                       "Function may not work")
     
-    if len(values) <= 2:
+    if nUnique <= 2:
+        values = data.unique()
         warnings.warn('1 or 2 unique values for density estimation. Dirac '
                       'Delta distribution(s) is(are) assumed. Input of '
                       '"kernels", "paretoRadius" and "MinAnzKernels" or '
@@ -97,11 +150,11 @@ def pareto_density_estimation(data, paretoRadius=None, kernels=None,
                       "potientially cannot be calcualted.")
     
     if paretoRadius is None:
-        paretoRadius = pareto_radius(data)
+        paretoRadius = pareto_radius(data, random_state=random_state)
     if pd.isnull(paretoRadius) == True:
-        paretoRadius = pareto_radius(data)
+        paretoRadius = pareto_radius(data, random_state=random_state)
     if paretoRadius == 0:
-        paretoRadius = pareto_radius(data)
+        paretoRadius = pareto_radius(data, random_state=random_state)
     
     minData = data.min()
     maxData = data.max()
@@ -113,50 +166,57 @@ def pareto_density_estimation(data, paretoRadius=None, kernels=None,
     
     if (kernels is None) or (kernels == 0) or (nKernels == 0) \
         or ((nKernels == 1) & (kernels[0] == 0)):
-        nBins = optimal_no_bins(data)
-        nBins = max(minAnzKernels , nBins)
-        
-        if nBins > 100:
-            if nBins > 10000:
-                nBins = 10000
-                warnings.warn("Too many bins estimated, try to transform or "
-                              "sample the data")
-            else:
-                nBins = nBins * 3 + 1
-        
-        breaks = pretty(minData, maxData, nBins)
-        kernels = 0.5 * (breaks[1:] + breaks[:-1])
+        kernels = pde_kernels(minData, maxData, optimal_no_bins(data), 
+                              minAnzKernels)
     
     if np.min(kernels) - paretoRadius > minData:
         np.append(kernels, minData)
     if np.max(kernels) + paretoRadius < maxData:
         np.append(kernels, maxData)
-    kernels.sort()
+    kernels = np.sort(np.asarray(kernels, dtype=float))
     
     nKernels = len(kernels)
-    # edge approximation
-    # this data is at the lower edge
-    lowData = data[data < (minData + paretoRadius)]
-    lowR = 2 * minData - lowData
-    # this data is at the upper edge
-    upData = data[data > (maxData - paretoRadius)]
-    upR = 2 * maxData - upData
-    # extend data by mirrowing
-    dataPlus = pd.concat([data, lowR, upR])
-    
-    paretoDensity = []
-    for fltKernel in kernels:
-        lb = fltKernel - paretoRadius
-        ub = fltKernel + paretoRadius
-        dataTemp = dataPlus[(dataPlus >= lb) & (dataPlus <= ub)]
-        paretoDensity.append(len(dataTemp))
+    if binned is None:
+        if binnedThreshold is None:
+            binnedThreshold = BINNED_THRESHOLD
+        binned = len(data) > binnedThreshold
+    
+    if binned == True:
+        # counts of the kernels from a fine histogram by cumulative sums, 
+        # O(n + BINNED_BINS + nKernels * log(BINNED_BINS)) without sorting,
+        # the edges are mirrored bin by bin
+        histogram = KernelHistogram(MaxBins=BINNED_BINS)
+        histogram.update(data.values)
+        paretoDensity = binned_kernel_counts(histogram.centers(), 
+                                             histogram.counts, kernels, 
+                                             paretoRadius, minData, maxData)
+    else:
+        # edge approximation
+        # this data is at the lower edge
+        lowData = data[data < (minData + paretoRadius)]
+        lowR = 2 * minData - lowData
+        # this data is at the upper edge
+        upData = data[data > (maxData - paretoRadius)]
+        upR = 2 * maxData - upData
+        # extend data by mirrowing
+        dataPlus = pd.concat([data, lowR, upR])
+        
+        # counting the points inside [kernel - radius, kernel + radius] for 
+        # all kernels at once: sort the mirrored data once and find both 
+        # window bounds by binary search, O((n + nKernels) * log(n)) instead
+        # of O(n * nKernels)
+        sortedData = np.sort(dataPlus.values)
+        lb = np.searchsorted(sortedData, kernels - paretoRadius, side="left")
+        ub = np.searchsorted(sortedData, kernels + paretoRadius, 
+                             side="right")
+        paretoDensity = ub - lb
     
     area = np.trapz(paretoDensity, kernels)
     
     if (pd.isnull(area)) | (area < 0.0000000001):
         paretoDensity = [0 for x in range(nKernels)]
     else:
-        paretoDensity = [x / area for x in paretoDensity]
+        paretoDensity = list(paretoDensity / area)
     
     return {"kernels": kernels, "paretoDensity": paretoDensity, 
             "paretoRadius": paretoRadius}
\ No newline at end of file
@@ -11,9 +11,83 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.spatial.distance import pdist
 from scipy.stats.mstats import mquantiles
+from .sampling import sample_positions
+
+
+def _count_distances(sortedData, dist):
+    """
+    Counts the pairwise distances of sorted one dimensional data which are 
+    smaller or equal than dist without building the distance matrix, O(m) 
+    memory and O(m * log(m)) time
+    """
+    upper = np.searchsorted(sortedData, sortedData + dist, side="right")
+    return int((upper - np.arange(1, len(sortedData) + 1)).sum())
+
+
+def _kth_distance(sortedData, k):
+    """
+    Selects the k-th smallest (starting at 1) pairwise distance of sorted one 
+    dimensional data by binary search on the radius
+    """
+    # non negative doubles are ordered like their bit patterns, so searching 
+    # on the integer view converges to neighbouring doubles in <= 64 steps
+    lo = np.int64(0)
+    hi = np.array(2 * (sortedData[-1] - sortedData[0]) + 1, dtype=np.float64)\
+    .view(np.int64)
+    while lo < hi:
+        mid = lo + (hi - lo) // 2
+        if _count_distances(sortedData, np.int64(mid).view(np.float64)) >= k:
+            hi = mid
+        else:
+            lo = mid + 1
+    dist = np.int64(lo).view(np.float64)
+    # snap to the largest distance of a real pair below the found radius
+    upper = np.searchsorted(sortedData, sortedData + dist, side="right") - 1
+    mask = upper > np.arange(len(sortedData))
+    return (sortedData[upper[mask]] - sortedData[mask]).max()
+
+
+def _distance_quantile(sortedData, prob, alphap=1/3, betap=1/3):
+    """
+    Quantile of all pairwise distances of sorted one dimensional data, uses 
+    the same plotting positions as mquantiles(pdist(data), prob, alphap, 
+    betap)
+    
+    Args:
+        sortedData (array): sorted one dimensional data without nan
+        prob (float): probability of the quantile
+        alphap (float): plotting positions parameter of mquantiles
+        betap (float): plotting positions parameter of mquantiles
+    
+    Returns:
+        float value of the quantile
+    """
+    nData = len(sortedData)
+    nDist = nData * (nData - 1) // 2
+    if nDist == 0:
+        return np.nan
+    if nDist == 1:
+        return sortedData[1] - sortedData[0]
+    # zero distances are pairs of equal values
+    _, counts = np.unique(sortedData, return_counts=True)
+    nZero = int((counts * (counts - 1) // 2).sum())
+    
+    aleph = nDist * prob + alphap + prob * (1 - alphap - betap)
+    k = int(np.floor(min(max(aleph, 1), nDist - 1)))
+    gamma = min(max(aleph - k, 0), 1)
+    
+    # k-th and (k+1)-th smallest distances, zeros need no search
+    lower = 0.0 if k <= nZero else _kth_distance(sortedData, k)
+    if gamma > 0:
+        upper = 0.0 if k + 1 <= nZero else _kth_distance(sortedData, k + 1)
+    else:
+        upper = lower
+    return (1 - gamma) * lower + gamma * upper
+
 
 def pareto_radius(data, maximumNrSamples = 10000, 
-                  plotDistancePercentiles = False):
+                  plotDistancePercentiles = False, random_state = None, 
+                  nTotal = None):
     """
     function calculates the Pareto-Radius for passed gauss mixture modell
     
@@ -23,9 +97,20 @@ def pareto_radius(data, maximumNrSamples = 10000,
         maximumNrSamples (int): maximum number of samples (number of all array 
                                 cells: number of rows * number of columns)
         plotDistancePercentiles (boolean): plot percentiles
+        random_state (None / int / Generator): seed of the sample of rows if
+                                               data has more cells than 
+                                               maximumNrSamples
+        nTotal (int): number of values data is a sample of (e.g. all values
+                      of a stream), used for the scaling of the radius by 
+                      the number of values, number of cells of data if None
     
     Returns:
         float value of Pareto-Radius
+    
+    For one dimensional data the distance percentiles are selected from the 
+    sorted data without building all pairwise distances (O(m) memory instead 
+    of O(m^2)), thus maximumNrSamples can be set much higher in that case. 
+    Multi-column data and plotting use scipy's pdist.
     """
     
     # convert data to pandas dataframe
@@ -46,21 +131,38 @@ def pareto_radius(data, maximumNrSamples = 10000,
         sampleData = data
     else:
         intSize = int(np.floor(maximumNrSamples / data.shape[1]))
-        sampledIndex = np.sort(np.random.choice(list(data.index), 
-                                                size=intSize, 
-                                                replace=False))
-        sampleData = data.loc[sampledIndex]
-    
-    # calculate distances
-    distvec = pdist(sampleData)
-    
-    # selection of ParetoRadius
-    paretoRadius = mquantiles(distvec, 18/100, alphap=1/3, betap=1/3)
+        sampleData = data.iloc[sample_positions(data.shape[0], intSize, 
+                                                random_state)]
     
-    if paretoRadius == 0:
-        pzt = pd.Series(mquantiles(distvec, [(x+1)/100 for x in range(100)], 
-                                   alphap=1/3, betap=1/3)).dropna()
-        paretoRadius = pzt[pzt > 0].min()
+    if sampleData.shape[1] == 1 and plotDistancePercentiles == False:
+        # one dimensional data: order statistics of the implicit distances
+        sortedData = np.sort(sampleData.values[:, 0])
+        sortedData = sortedData[np.isfinite(sortedData)]
+        
+        # selection of ParetoRadius
+        paretoRadius = _distance_quantile(sortedData, 18/100)
+        
+        if paretoRadius == 0:
+            # smallest positive distance percentile
+            paretoRadius = np.nan
+            for x in range(100):
+                pzt = _distance_quantile(sortedData, (x+1)/100)
+                if pzt > 0:
+                    paretoRadius = pzt
+                    break
+        paretoRadius = np.array([paretoRadius])
+    else:
+        # calculate distances
+        distvec = pdist(sampleData)
+        
+        # selection of ParetoRadius
+        paretoRadius = mquantiles(distvec, 18/100, alphap=1/3, betap=1/3)
+        
+        if paretoRadius == 0:
+            pzt = pd.Series(mquantiles(distvec, 
+                                       [(x+1)/100 for x in range(100)], 
+                                       alphap=1/3, betap=1/3)).dropna()
+            paretoRadius = pzt[pzt > 0].min()
     
     # replace inf by nan for checiking issues
     psParetoCheck = pd.Series(paretoRadius)
@@ -89,8 +191,10 @@ def pareto_radius(data, maximumNrSamples = 10000,
     # MT:
     # ALUs heuristik, in matlab in PDEplot, hier in dieser Funktion,
     # damit AdaptGauss die selbe Darstellung benutzt
-    if nData > 1024:
-        paretoRadius = paretoRadius * 4 / nData**0.2
+    if nTotal is None:
+        nTotal = nData
+    if nTotal > 1024:
+        paretoRadius = paretoRadius * 4 / nTotal**0.2
     
     try:
         return paretoRadius[0]
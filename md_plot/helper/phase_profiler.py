@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import tracemalloc
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("md_plot")
+
+
+class PhaseProfiler:
+    """
+    Records wall time, processed rows and the peak memory of the phases of
+    MDplot (and per column for the statistics and the densities). Each 
+    record is logged to the logger "md_plot" with level INFO and handed to 
+    the callback.
+    
+    The memory of a record is the peak of the memory allocated during the
+    phase (or column) above the memory allocated at its start, traced with
+    tracemalloc. Tracing runs while a phase is open and slows allocations 
+    down, memory of worker processes is not traced. Memory of columns needs
+    tracemalloc.reset_peak (python 3.9), otherwise it is nan.
+    
+    Args:
+        callback (callable): called with each record (dictionary containing
+                             phase, column, seconds, rows and memory)
+        enabled (bool): a disabled profiler records nothing
+    
+    Usage:
+        profiler = PhaseProfiler()
+        profiler.start("Scaling", rows=len(Data))
+        ...
+        profiler.stop()
+        profiler.to_frame()
+    """
+    
+    def __init__(self, callback=None, enabled=True):
+        self.callback = callback
+        self.enabled = enabled
+        self.records = []
+        self._open = None
+        self._peak = 0
+        self._tracing = False
+    
+    def _reset_peak(self):
+        """ traced memory in bytes, from which a new peak is measured """
+        current, peak = tracemalloc.get_traced_memory()
+        # the peak of the open phase is kept while a column is measured
+        self._peak = max(self._peak, peak)
+        if not hasattr(tracemalloc, "reset_peak"):
+            return np.nan
+        tracemalloc.reset_peak()
+        return current
+    
+    def _peak_above(self, base):
+        """ peak of the traced memory above base in bytes """
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak = max(self._peak, peak)
+        return peak - base
+    
+    def start(self, phase, rows=None):
+        """ starts a phase, a running phase is stopped """
+        if not self.enabled:
+            return
+        self.stop()
+        if tracemalloc.is_tracing():
+            # traced by the caller, measured relative to its state
+            base = self._reset_peak()
+        else:
+            tracemalloc.start()
+            self._tracing = True
+            base = 0
+        self._peak = 0
+        self._open = (phase, rows, perf_counter(), base)
+    
+    def stop(self):
+        """ stops the running phase """
+        if not self.enabled or self._open is None:
+            return
+        phase, rows, start, base = self._open
+        seconds = perf_counter() - start
+        self._peak_above(base)
+        memory = self._peak - base
+        self._open = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        self.add(phase, None, seconds, rows, memory)
+    
+    # plotnine deep copies plots and layer parameters, all copies have to
+    # record into one profiler
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    def mark(self):
+        """
+        Start of a record of a single column inside of the open phase, see 
+        add_since
+        
+        Returns:
+            tuple of the wall clock and the traced memory
+        """
+        if not self.enabled or not tracemalloc.is_tracing():
+            return perf_counter(), np.nan
+        return perf_counter(), self._reset_peak()
+    
+    def add_since(self, mark, phase, column, rows=None):
+        """
+        Adds the record of a single column measured since mark
+        
+        Args:
+            mark (tuple): returned by mark at the start of the column
+            phase (str): name of the phase
+            column (str): name of the column
+            rows (int): number of processed rows or values
+        """
+        if not self.enabled:
+            return
+        start, base = mark
+        seconds = perf_counter() - start
+        memory = np.nan
+        if not pd.isnull(base) and tracemalloc.is_tracing():
+            memory = self._peak_above(base)
+        self.add(phase, column, seconds, rows, memory)
+    
+    def add(self, phase, column, seconds, rows=None, memory=np.nan):
+        """
+        Adds a record, e.g. of a single column
+        
+        Args:
+            phase (str): name of the phase
+            column (str): name of the column, None for a whole phase
+            seconds (float): wall time
+            rows (int): number of processed rows or values
+            memory (float): peak of the allocated memory in bytes
+        """
+        if not self.enabled:
+            return
+        dctRecord = {"phase": phase, "column": column, "seconds": seconds,
+                     "rows": rows, "memory": memory}
+        self.records.append(dctRecord)
+        logger.info("MDplot %s%s: %.4f s, %s rows, %.1f MB", phase,
+                    "" if column is None else " [" + str(column) + "]",
+                    seconds, rows, memory / 2**20)
+        if self.callback is not None:
+            self.callback(dctRecord)
+    
+    def to_frame(self):
+        """ records as dataframe """
+        return pd.DataFrame(self.records, columns=["phase", "column",
+                                                   "seconds", "rows",
+                                                   "memory"])
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import numpy as np
+from scipy.stats import norm
+from .sampling import sample_positions, random_generator
+
+
+def boxplot_table(ragged, coef=1.5, VariableName="Variables"):
+    """
+    Box-plot statistics of all variables of a RaggedColumns container,
+    identical to the statistics of plotnine's stat_boxplot, to be drawn with
+    geom_boxplot(stat="identity")
+    
+    Args:
+        ragged (RaggedColumns): values of the variables
+        coef (float): length of the whiskers as multiple of the IQR
+        VariableName (str): name of the column of the variables
+    
+    Returns:
+        dataframe with one row per variable containing ymin, lower, middle,
+        upper, ymax, outliers (list of values), notchlower, notchupper, n
+        and relvarwidth
+    """
+    lstRows = []
+    for strVar, values in ragged.items():
+        n = len(values)
+        if n == 0:
+            continue
+        q1, med, q3 = np.percentile(values, (25, 50, 75))
+        iqr = q3 - q1
+        
+        lox = values[values >= q1 - coef * iqr]
+        if len(lox) == 0 or np.min(lox) > q1:
+            whislo = q1
+        else:
+            whislo = np.min(lox)
+        hix = values[values <= q3 + coef * iqr]
+        if len(hix) == 0 or np.max(hix) < q3:
+            whishi = q3
+        else:
+            whishi = np.max(hix)
+        
+        lstRows.append({VariableName: strVar, "ymin": whislo, "lower": q1,
+                        "middle": med, "upper": q3, "ymax": whishi,
+                        "outliers": values[(values < whislo)
+                                           | (values > whishi)],
+                        "notchlower": med - 1.58 * iqr / np.sqrt(n),
+                        "notchupper": med + 1.58 * iqr / np.sqrt(n),
+                        "n": n, "relvarwidth": np.sqrt(n)})
+    return pd.DataFrame(lstRows, columns=[VariableName, "ymin", "lower",
+                                          "middle", "upper", "ymax",
+                                          "outliers", "notchlower",
+                                          "notchupper", "n", "relvarwidth"])
+
+
+def jitter_table(ragged, maxPoints=None, random_state=None,
+                 VariableName="Variables", ValueName="Values"):
+    """
+    Points of all variables of a RaggedColumns container in long format for
+    a jitter plot, variables with more than maxPoints values are subsampled
+    
+    Args:
+        ragged (RaggedColumns): values of the variables
+        maxPoints (int): maximal number of points per variable, None keeps
+                         all points
+        random_state (None / int / Generator): seed of the subsample, see
+                                               sample_positions
+        VariableName (str): name of the column of the variables
+        ValueName (str): name of the column of the values
+    
+    Returns:
+        dataframe with the columns VariableName and ValueName
+    """
+    rng = random_generator(random_state)
+    lstPoints = []
+    for strVar, values in ragged.items():
+        if maxPoints is not None and len(values) > maxPoints:
+            values = values[sample_positions(len(values), maxPoints, rng)]
+        lstPoints.append(pd.DataFrame({VariableName: strVar,
+                                       ValueName: values}))
+    if len(lstPoints) == 0:
+        return pd.DataFrame(columns=[VariableName, ValueName])
+    return pd.concat(lstPoints, ignore_index=True)
+
+
+def gaussian_table(densities, params, VariableName="Variables", 
+                   KernelName="x"):
+    """
+    Normal densities truncated to the range of the data, evaluated at the
+    kernels of the pareto densities of the same variables (and the minimum
+    and maximum), to be drawn with stat_pde_density(precomputed=True)
+    instead of estimating the density of a sample of the normal distribution
+    
+    Args:
+        densities (dataframe): pareto densities in the long format of 
+                               pde_density_table
+        params (dataframe): one row per variable (index) containing mhat,
+                            shat, min, max and n
+        VariableName (str): name of the column of the variables
+        KernelName (str): name of the column of the kernels
+    
+    Returns:
+        dataframe with the columns VariableName, KernelName, density and n
+    """
+    dctKernels = {strVar: kernels.values for strVar, kernels 
+                  in densities.groupby(VariableName, sort=False)[KernelName]}
+    lstDens = []
+    for strVar, row in params.iterrows():
+        mass = norm.cdf(row["max"], row["mhat"], row["shat"]) \
+        - norm.cdf(row["min"], row["mhat"], row["shat"])
+        if not row["shat"] > 0 or not mass > 0:
+            continue
+        kernels = dctKernels.get(strVar, np.array([]))
+        kernels = np.unique(np.concatenate([
+            [row["min"]], 
+            kernels[(kernels > row["min"]) & (kernels < row["max"])], 
+            [row["max"]]]))
+        lstDens.append(pd.DataFrame({
+            VariableName: strVar, KernelName: kernels,
+            "density": norm.pdf(kernels, row["mhat"], row["shat"]) / mass,
+            "n": row["n"]}))
+    if len(lstDens) == 0:
+        return pd.DataFrame(columns=[VariableName, KernelName, "density", 
+                                     "n"])
+    return pd.concat(lstDens, ignore_index=True)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class RaggedColumns:
+    """
+    Compact storage of variables with different numbers of values: the
+    values of all variables are kept in one contiguous float64 buffer, the
+    values of variable i are buffer[offsets[i]:offsets[i+1]]. Unlike a wide
+    dataframe no nan padding is stored.
+    
+    Args:
+        names (list): names of the variables
+        buffer (array): values of all variables one after another
+        offsets (array): start of each variable in buffer, followed by the
+                         length of buffer (len(names) + 1 entries)
+    """
+    __slots__ = ("names", "buffer", "offsets")
+    
+    def __init__(self, names, buffer, offsets):
+        self.names = list(names)
+        self.buffer = np.ascontiguousarray(buffer, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if len(self.offsets) != len(self.names) + 1:
+            raise Exception("offsets need one entry more than names")
+    
+    @classmethod
+    def from_frame(cls, Data):
+        """
+        Non nan values of each column of a dataframe
+        
+        Args:
+            Data (dataframe): numeric dataframe, each column is one variable
+        
+        Returns:
+            RaggedColumns
+        """
+        lstMasks = [Data[strCol].notna().values for strCol in Data.columns]
+        lengths = np.array([mask.sum() for mask in lstMasks], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        buffer = np.empty(offsets[-1], dtype=np.float64)
+        for i, strCol in enumerate(Data.columns):
+            buffer[offsets[i]:offsets[i+1]] = Data[strCol].values[lstMasks[i]]
+        return cls(Data.columns, buffer, offsets)
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def items(self):
+        """ iterates over (name, values) of all variables """
+        for i, name in enumerate(self.names):
+            yield name, self.buffer[self.offsets[i]:self.offsets[i+1]]
+    
+    def subset(self, names):
+        """ variables in the order of names as new RaggedColumns """
+        lstIdx = [self.names.index(name) for name in names]
+        lengths = np.diff(self.offsets)[lstIdx]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        buffer = np.empty(offsets[-1], dtype=np.float64)
+        for j, i in enumerate(lstIdx):
+            buffer[offsets[j]:offsets[j+1]] = \
+            self.buffer[self.offsets[i]:self.offsets[i+1]]
+        return RaggedColumns(names, buffer, offsets)
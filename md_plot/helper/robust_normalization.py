@@ -10,11 +10,50 @@ import pandas as pd
 import numpy as np
 from pandas.api.types import is_numeric_dtype
 
+def _normalize_matrix(values, centered, capped):
+    """
+    Robust normalization of all columns of a float matrix in place
+    
+    Args:
+        values (array): 2D float array, one variable per column, nan values 
+                        are ignored
+        centered (boolean): centeres normalized data to center = 0
+        capped (boolean): cuts values below and above the normalization limits
+    
+    Returns:
+        arrays of minX, maxX, denom and center per column
+    """
+    if values.size == 0:
+        # no rows or no columns, the limits are nan like pandas
+        undefined = np.full(values.shape[1], np.nan)
+        return undefined, undefined, undefined, np.zeros(values.shape[1])
+    with warnings.catch_warnings():
+        # columns without values give nan like pandas
+        warnings.simplefilter("ignore", RuntimeWarning)
+        minX, maxX = np.nanquantile(values, [0.01, 0.99], axis=0)
+        denom = maxX - minX
+        denom[denom == 0] = 1
+        np.subtract(values, minX, out=values)
+        np.divide(values, denom, out=values)
+        
+        center = np.zeros(values.shape[1], dtype=values.dtype)
+        if centered == True:
+            center = np.nanmedian(values, axis=0)
+            np.subtract(values, center, out=values)
+            if capped == True:
+                np.clip(values, -1, 1, out=values)
+        else:
+            if capped == True:
+                minX, maxX = np.nanquantile(values, [0.01, 0.99], axis=0)
+                np.clip(values, minX, maxX, out=values)
+    return minX, maxX, denom, center
+
 def robust_normalization(data, centered=False, capped=False, narm=True, 
-                         withBackTransformation=False):
+                         withBackTransformation=False, inplace=False, 
+                         dtype=np.float64):
     """
     This function normalizes all numeric columns of a pandas dataframe or a 
-    single pandas series
+    single pandas series. All columns are normalized at once.
     
     Args:
         data (dataframe / series): data to be normalized
@@ -23,79 +62,68 @@ def robust_normalization(data, centered=False, capped=False, narm=True,
         narm (boolean): removes infinite values
         withBackTransformation (boolean): provides information to denormalize 
                                           the data again
+        inplace (boolean): overwrites the numeric columns of data instead of 
+                           returning new objects (non numeric columns are 
+                           kept in this case). Without copy only if the 
+                           numeric columns are stored as one array of 
+                           dtype (a series or a dataframe of one float 
+                           block), otherwise they are copied once.
+        dtype (dtype): float type of the computation, e.g. np.float32 to 
+                       halve the memory
     
     Return:
         Normalized data as dataframe or a dictionary containing the normalized 
         data as dataframe and all information to denormalize the data
     """
     
-    # replace infinte vales by nan
-    if narm == True:
-        data = data.replace([np.inf, -np.inf], np.nan)
-    
     #__________________________________________________________NORMALIZE SERIES
-    center=0
     if isinstance(data, pd.Series):
-        minX = data.quantile(0.01)
-        maxX = data.quantile(0.99)
-        denom = maxX - minX
-        if denom == 0:
-            denom = 1
-        data = (data - minX) / denom
-        
-        if centered == True:
-            center = data.median()
-            data = data - center
-            if capped == True:
-                data = data.apply(lambda x: -1 if x < -1 else x)
-                data = data.apply(lambda x: 1 if x > 1 else x)
+        values = data.to_numpy(dtype=dtype, copy=not inplace)[:, np.newaxis]
+        if narm == True:
+            values[np.isinf(values)] = np.nan
+        minX, maxX, denom, center = _normalize_matrix(values, centered, 
+                                                      capped)
+        if inplace == True:
+            if not np.shares_memory(values, data.values):
+                data[:] = values[:, 0]
         else:
-            if capped == True:
-                minX = data.quantile(0.01)
-                maxX = data.quantile(0.99)
-                data = data.apply(lambda x: minX if x < minX else x)
-                data = data.apply(lambda x: maxX if x > maxX else x)
+            data = pd.Series(values[:, 0], index=data.index, name=data.name)
         
         if withBackTransformation == True:
-            return {"TransformedData": data, "MinX": minX, "MaxX": maxX, 
-                    "Denom": denom, "Center": center}
+            return {"TransformedData": data, "MinX": minX[0], 
+                    "MaxX": maxX[0], "Denom": denom[0], "Center": center[0]}
         else:
             return data
     
     #_______________________________________________________NORMALIZE DATAFRAME
     if isinstance(data, pd.DataFrame):
+        lstCols = [strCol for strCol in data.columns 
+                   if is_numeric_dtype(data[strCol])]
+        isView = False
+        if inplace == True and 0 < len(lstCols) == data.shape[1]:
+            # a view on the data if it is a single block of dtype
+            values = data.to_numpy(dtype=dtype, copy=False)
+            isView = np.shares_memory(values, data.iloc[:, 0].to_numpy())
+        else:
+            values = data[lstCols].to_numpy(dtype=dtype, copy=True)
+        if narm == True:
+            values[np.isinf(values)] = np.nan
+        minX, maxX, denom, center = _normalize_matrix(values, centered, 
+                                                      capped)
+        if inplace == True:
+            if not isView:
+                data[lstCols] = values
+            dataOut = data
+        else:
+            dataOut = pd.DataFrame(values, index=data.index, columns=lstCols)
+        
         if withBackTransformation == True:
-            lstCols = list(data.columns)
-            dataOut = pd.DataFrame()
-            minX = {}
-            maxX = {}
-            denom = {}
-            center = {}
-            for strCol in lstCols:
-                if is_numeric_dtype(data[strCol]):
-                    xtrans = robust_normalization(data[strCol], 
-                                                  centered=centered, 
-                                                  capped=capped, 
-                                                  narm=narm, 
-                                withBackTransformation=withBackTransformation)
-                    dataOut[strCol] = xtrans["TransformedData"]
-                    minX[strCol] = xtrans["MinX"]
-                    maxX[strCol] = xtrans["MaxX"]
-                    denom[strCol] = xtrans["Denom"]
-                    center[strCol] = xtrans["Center"]
-            return {"TransformedData": dataOut, "MinX": minX, "MaxX": maxX, 
-                    "Denom": denom, "Center": center}
+            return {"TransformedData": dataOut, 
+                    "MinX": dict(zip(lstCols, minX)), 
+                    "MaxX": dict(zip(lstCols, maxX)), 
+                    "Denom": dict(zip(lstCols, denom)), 
+                    "Center": dict(zip(lstCols, center))}
         else:
-            lstCols = list(data.columns)
-            dataOut = pd.DataFrame()
-            for strCol in lstCols:
-                if is_numeric_dtype(data[strCol]):
-                    xtrans = robust_normalization(data[strCol], 
-                                                  centered=centered, 
-                                                  capped=capped, 
-                                                  narm=narm, 
-                                withBackTransformation=withBackTransformation)
-                    dataOut[strCol] = xtrans
             return dataOut
     
     #____________________________________________________HANDLE WRONG DATA TYPE
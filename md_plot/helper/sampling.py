@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+def seed_sequence(random_state=None):
+    """
+    Seed sequence of numpy from a seed, independent child streams (e.g. one
+    per column or per worker) are spawned from it
+    
+    Args:
+        random_state (None / int / SeedSequence / Generator / RandomState):
+                     seed, a SeedSequence is returned unchanged. If None 
+                     (or a Generator or RandomState) the entropy is drawn 
+                     from numpy's global random state (or the generator), 
+                     thus np.random.seed makes the results reproducible.
+    
+    Returns:
+        SeedSequence
+    """
+    if isinstance(random_state, np.random.SeedSequence):
+        return random_state
+    if random_state is None:
+        random_state = np.random.randint(0, 2**31 - 1, size=4)
+    elif isinstance(random_state, np.random.RandomState):
+        random_state = random_state.randint(0, 2**31 - 1, size=4)
+    elif isinstance(random_state, np.random.Generator):
+        random_state = random_state.integers(0, 2**31 - 1, size=4)
+    return np.random.SeedSequence(random_state)
+
+
+def random_generator(random_state=None):
+    """
+    Random generator of numpy from a seed
+    
+    Args:
+        random_state (None / int / SeedSequence / Generator / RandomState):
+                     seed of the generator, a Generator is returned
+                     unchanged, see seed_sequence
+    
+    Returns:
+        Generator
+    """
+    if isinstance(random_state, np.random.Generator):
+        return random_state
+    return np.random.default_rng(seed_sequence(random_state))
+
+
+def spawn_generators(random_state, n):
+    """
+    Independent random generators, e.g. one per column, thus results do not
+    depend on the order or the parallel execution of the columns
+    
+    Args:
+        random_state (None / int / SeedSequence / Generator / RandomState):
+                     seed, see seed_sequence
+        n (int): number of generators
+    
+    Returns:
+        list of Generators
+    """
+    return [np.random.default_rng(seed) 
+            for seed in seed_sequence(random_state).spawn(n)]
+
+
+def seed_key(random_state):
+    """
+    Hashable identity of a reproducible seed, e.g. for cache keys of 
+    results which depend on random numbers
+    
+    Args:
+        random_state (None / int / SeedSequence / Generator / RandomState):
+                     seed
+    
+    Returns:
+        tuple of entropy and spawn key of the seed sequence, None for seeds
+        which draw new numbers on each use (None, Generator, RandomState)
+    """
+    if isinstance(random_state, (int, np.integer)):
+        random_state = np.random.SeedSequence(int(random_state))
+    if not isinstance(random_state, np.random.SeedSequence):
+        return None
+    return (np.asarray(random_state.entropy).tolist(), 
+            tuple(random_state.spawn_key))
+
+
+def sample_positions(n, size, random_state=None, sort=True):
+    """
+    Positions of a random sample without replacement out of n rows. Small
+    samples are drawn with Floyd's algorithm of Generator.choice, thus the
+    cost depends on the size of the sample and not on n (samples larger
+    than n / 50 partially shuffle range(n)). No index or list of the rows
+    is built.
+    
+    Args:
+        n (int): number of rows
+        size (int): size of the sample, all positions are returned if size
+                    is not smaller than n
+        random_state (None / int / SeedSequence / Generator / RandomState):
+                     seed, see random_generator
+        sort (bool): return the positions in ascending order
+    
+    Returns:
+        array of positions
+    """
+    if size >= n:
+        return np.arange(n)
+    positions = random_generator(random_state).choice(n, size=size,
+                                                      replace=False,
+                                                      shuffle=False)
+    if sort == True:
+        positions.sort()
+    return positions
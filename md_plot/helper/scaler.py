@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_numeric_dtype
+from .robust_normalization import robust_normalization
+from .signed_log import signed_log
+from .stream_summary import StreamSummary
+
+# scaling methods of MDplot
+SCALINGS = ("Percentalize", "CompleteRobust", "Robust", "Log")
+
+
+class Scaler:
+    """
+    Scaling of MDplot as fitted transformer: the parameters of the scaling
+    (limits, denominator and center of robust_normalization, minimum and
+    maximum for Percentalize) are fitted once on reference data and then
+    applied to new data. The reference can be streamed chunk by chunk with
+    partial_fit. Fitted scalers can be stored with to_dict / from_dict (or
+    pickle) and passed to MDplot(Scaling=scaler).
+    
+    Args:
+        Scaling (str): scaling method, one of: Percentalize, CompleteRobust,
+                                               Robust, Log
+        base (str / numeric): base of the logarithm for Log, see signed_log
+        SampleSize (int): size of the reservoir sample per column which is
+                          used for the quantiles if the reference is streamed
+        random_state (None / int / Generator): seed of the reservoir samples
+    
+    Usage:
+        scaler = Scaler("CompleteRobust").fit(history)
+        MDplot(newData, Scaling=scaler)
+    """
+    
+    def __init__(self, Scaling="Robust", base="Ten", SampleSize=500000,
+                 random_state=None):
+        if Scaling not in SCALINGS:
+            raise Exception("Scaling has to be one of: "
+                            + ", ".join(SCALINGS))
+        self.Scaling = Scaling
+        self.base = base
+        self.SampleSize = SampleSize
+        self.random_state = random_state
+        self.params = None
+        self._summary = None
+    
+    def _numeric(self, data):
+        if isinstance(data, pd.Series):
+            data = data.to_frame()
+        if not isinstance(data, pd.DataFrame):
+            try:
+                data = pd.DataFrame(data)
+            except:
+                raise Exception("Data cannot be converted into pandas "
+                                "dataframe")
+        lstCols = [strCol for strCol in data.columns
+                   if is_numeric_dtype(data[strCol])]
+        return data[lstCols]
+    
+    def fit(self, data):
+        """
+        Fits the parameters of the scaling on reference data
+        
+        Args:
+            data (dataframe / series): reference data
+        
+        Returns:
+            fitted Scaler
+        """
+        self._fit(self._numeric(data))
+        return self
+    
+    def _fit(self, data):
+        """
+        Fits the parameters on numeric data
+        
+        Returns:
+            scaled data of robust_normalization for Robust and 
+            CompleteRobust, else None
+        """
+        self._summary = None
+        transformed = None
+        if self.Scaling == "Percentalize":
+            self.params = pd.DataFrame({"Min": data.min(),
+                                        "Max": data.max()})
+        elif self.Scaling in ("CompleteRobust", "Robust"):
+            centered = self.Scaling == "CompleteRobust"
+            dctTrans = robust_normalization(data, centered=centered,
+                                            capped=centered,
+                                            withBackTransformation=True)
+            self.params = pd.DataFrame({"MinX": dctTrans["MinX"],
+                                        "Denom": dctTrans["Denom"],
+                                        "Center": dctTrans["Center"]},
+                                       index=list(data.columns))
+            transformed = dctTrans["TransformedData"]
+        else:
+            self.params = pd.DataFrame(index=list(data.columns))
+        return transformed
+    
+    def partial_fit(self, chunk):
+        """
+        Adds a chunk of the reference data, the parameters are fitted on
+        the streamed data (reservoir samples of SampleSize values per column
+        for the quantiles) when the scaler is used
+        
+        Args:
+            chunk (dataframe / series): chunk of reference data
+        
+        Returns:
+            Scaler
+        """
+        if self._summary is None:
+            self._summary = StreamSummary(SampleSize=self.SampleSize,
+                                          random_state=self.random_state)
+        self._summary.update(self._numeric(chunk))
+        self.params = None
+        return self
+    
+    def _fitted_params(self):
+        if self.params is None and self._summary is not None:
+            summary = self._summary
+            self.fit(summary.sample())
+            if self.Scaling == "Percentalize":
+                # minimum and maximum are exact for the whole stream
+                dfSummary = summary.summary()
+                self.params["Min"] = dfSummary["min"]
+                self.params["Max"] = dfSummary["max"]
+            self._summary = summary
+        if self.params is None:
+            raise Exception("Scaler is not fitted")
+        return self.params
+    
+    def transform(self, data):
+        """
+        Scales data with the fitted parameters
+        
+        Args:
+            data (dataframe / series): data to be scaled, columns have to be
+                                       contained in the reference data
+        
+        Returns:
+            scaled data as dataframe (only numeric columns)
+        """
+        params = self._fitted_params()
+        data = self._numeric(data)
+        if self.Scaling == "Log":
+            return signed_log(data, base=self.base)
+        
+        lstMissing = [strCol for strCol in data.columns
+                      if strCol not in params.index]
+        if len(lstMissing) > 0:
+            raise Exception("Scaler was not fitted on column(s): "
+                            + ", ".join([str(x) for x in lstMissing]))
+        params = params.loc[list(data.columns)]
+        
+        if self.Scaling == "Percentalize":
+            return 100 * (data - params["Min"]) \
+            / (params["Max"] - params["Min"])
+        
+        values = data.to_numpy(dtype=float, copy=True)
+        values[np.isinf(values)] = np.nan
+        values = (values - params["MinX"].values) / params["Denom"].values
+        if self.Scaling == "CompleteRobust":
+            values = np.clip(values - params["Center"].values, -1, 1)
+        return pd.DataFrame(values, index=data.index, columns=data.columns)
+    
+    def fit_transform(self, data):
+        """
+        Fits the parameters on data and scales data, the robust scalings 
+        keep the data scaled while fitting instead of scaling it again
+        
+        Args:
+            data (dataframe / series): reference data to be scaled
+        
+        Returns:
+            scaled data as dataframe (only numeric columns)
+        """
+        data = self._numeric(data)
+        transformed = self._fit(data)
+        if transformed is None:
+            return self.transform(data)
+        return transformed
+    
+    def to_dict(self):
+        """
+        Fitted scaler as dictionary of plain python types (e.g. for json)
+        """
+        params = self._fitted_params()
+        return {"Scaling": self.Scaling, "base": self.base,
+                "SampleSize": self.SampleSize,
+                "columns": params.index.tolist(),
+                "params": {strParam: [float(x) for x in params[strParam]]
+                           for strParam in params.columns}}
+    
+    @classmethod
+    def from_dict(cls, dctScaler):
+        """
+        Scaler from the dictionary of to_dict
+        """
+        scaler = cls(dctScaler["Scaling"], base=dctScaler["base"],
+                     SampleSize=dctScaler["SampleSize"])
+        scaler.params = pd.DataFrame(dctScaler["params"],
+                                     index=dctScaler["columns"])
+        return scaler
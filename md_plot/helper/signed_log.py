@@ -5,41 +5,125 @@ Created on Sat Jun  8 13:25:26 2019
 @author: tinog
 """
 
+import pandas as pd
 import numpy as np
-from math import log
-from typing import Iterable
 
-def signed_log(data, base="Ten"):
+# named bases of the logarithm
+BASES = ("Two", "Zero", "Ten", "Natural")
+
+def _check_base(base):
+    """
+    Validates a base of the logarithm
+    
+    Args:
+        base (string / numeric): named base or number
+    
+    Returns:
+        base as named string or float
+    """
+    if isinstance(base, str) and base in BASES:
+        return base
+    try:
+        floatBase = float(base)
+    except (TypeError, ValueError):
+        raise Exception("base has to be a number or one of: "
+                        + ", ".join(BASES) + ", got " + repr(base))
+    if not floatBase > 0 or floatBase == 1:
+        raise Exception("base of the logarithm has to be positive and "
+                        "unequal to 1, got " + repr(base))
+    return floatBase
+
+def _signed_log_inplace(values, base):
+    """
+    Signed logarithm of a float array, computed in place without temporary 
+    copies of the values (only the signs are kept as int8)
+    
+    Args:
+        values (array): float array which is overwritten
+        base (string / float): checked base of the logarithm
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # sign(nan) is not representable as int8, but nan stays nan anyway
+        signed = np.sign(values, out=np.empty(values.shape, dtype=np.int8), 
+                         casting="unsafe")
+        np.abs(values, out=values)
+        if base == "Two":
+            np.add(values, 1, out=values)
+            np.log2(values, out=values)
+        elif base == "Zero":
+            np.log1p(values, out=values)
+        elif base == "Ten":
+            np.add(values, 1, out=values)
+            np.log10(values, out=values)
+        elif base == "Natural":
+            np.log(values, out=values)
+        else:
+            np.log(values, out=values)
+            np.divide(values, np.log(base), out=values)
+        np.multiply(values, signed, out=values)
+
+def signed_log(data, base="Ten", out=None, inplace=False):
     """
     Returns a signed logarithm of data
     
     Args:
-        data (numeric / list / array / series): data to be transformed
-        base (string / numeric): base of logarithm, can be number or a string 
-                                 with these values: Two, Zero, Ten, Natural
-        
+        data (numeric / list / array / series / dataframe): data to be
+                                                           transformed
+        base (string / numeric / list / dict): base of logarithm, can be
+                number or a string with these values: Two, Zero, Ten,
+                Natural. For dataframes and 2D arrays one base per column
+                can be given as list or as dictionary keyed by column.
+        out (array): array for the result of array input, may be data
+                     itself to transform without a copy
+        inplace (boolean): overwrites series and dataframes instead of
+                           returning new objects
+    
     Returns:
         signed logarithm of data
     """
     
-    absolut = np.abs(data)
-    signed = np.sign(data)
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        values = data.to_numpy(dtype=float, copy=True)
+    elif out is not None:
+        if out is not data:
+            np.copyto(out, data)
+        values = out
+    else:
+        values = np.array(data, dtype=float)
     
-    if base == "Two":
-        return signed * np.log2(absolut + 1)
-    if base == "Zero":
-        return signed * np.log1p(absolut)
-    if base == "Ten":
-        return signed * np.log10(absolut + 1)
-    if base == "Natural":
-        return signed * np.log(absolut)
+    if isinstance(base, (list, tuple, dict, pd.Series, np.ndarray)):
+        if values.ndim != 2:
+            raise Exception("One base per column needs a dataframe or a "
+                            "2D array")
+        if isinstance(base, (dict, pd.Series)):
+            if not isinstance(data, pd.DataFrame):
+                raise Exception("Bases keyed by column need a dataframe")
+            lstMissing = [x for x in data.columns if x not in base]
+            if len(lstMissing) > 0:
+                raise Exception("No base for column(s): "
+                                + ", ".join([str(x) for x in lstMissing]))
+            lstBases = [base[x] for x in data.columns]
+        else:
+            lstBases = list(base)
+        if len(lstBases) != values.shape[1]:
+            raise Exception("Number of bases does not match the number of "
+                            "columns")
+        lstBases = [_check_base(x) for x in lstBases]
+        for j, colBase in enumerate(lstBases):
+            _signed_log_inplace(values[:, j], colBase)
+    else:
+        _signed_log_inplace(values, _check_base(base))
     
-    try:
-        if isinstance(absolut, Iterable) == False:
-            absolut = np.array(absolut)
-        loged_data = []
-        for item in absolut:
-            loged_data.append(log(item, float(base)) * log(float(base)))
-        return signed * loged_data
-    except:
-        return signed * np.log10(absolut)
\ No newline at end of file
+    if isinstance(data, pd.Series):
+        if inplace == True:
+            data[:] = values
+            return data
+        return pd.Series(values, index=data.index, name=data.name)
+    if isinstance(data, pd.DataFrame):
+        if inplace == True:
+            data[list(data.columns)] = values
+            return data
+        return pd.DataFrame(values, index=data.index, columns=data.columns)
+    if values.ndim == 0:
+        return values[()]
+    return values
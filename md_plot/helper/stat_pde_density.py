@@ -11,6 +11,145 @@ import numpy as np
 from plotnine.stats.stat import stat
 from plotnine.exceptions import PlotnineError
 from .pareto_density_estimation import pareto_density_estimation
+from .sampling import random_generator, seed_sequence, seed_key
+from .column_profile import count_unique
+
+# number of values above which pareto_radius estimates the radius on a 
+# random sample (its maximumNrSamples)
+RADIUS_SAMPLE_SIZE = 10000
+
+def density_key(cache, values, binnedThreshold, random_state):
+    """
+    Cache key of the pareto density of values. Densities which depend on 
+    random numbers (radius estimated on a sample, a single unique value 
+    perturbed) are keyed by the seed and not cached at all if the seed is 
+    not reproducible.
+    
+    Args:
+        cache (DensityCache): cache of densities
+        values (array): values of the group
+        binnedThreshold (int): see pareto_density_estimation
+        random_state (None / int / SeedSequence / Generator): seed of the 
+                     density
+    
+    Returns:
+        string key or None if the density must not be cached
+    """
+    values = np.asarray(values)
+    finite = values[np.isfinite(values)]
+    seed = None
+    if len(finite) > RADIUS_SAMPLE_SIZE \
+    or count_unique(finite, MaxUnique=1)[0] == 1:
+        seed = seed_key(random_state)
+        if seed is None:
+            return None
+    return cache.make_key(values, "stat_pde_density", binnedThreshold, seed)
+
+def compute_pdedensity(x, random_state=None, binnedThreshold=None):
+    """
+    Pareto density of one group of stat_pde_density
+    
+    Args:
+        x (series): values of the group
+        random_state (None / int / Generator): seed for the perturbation of
+                     a single unique value and the sample of the pareto 
+                     radius, see random_generator
+        binnedThreshold (int): number of values above which the kernels are
+                               counted on binned data, see 
+                               pareto_density_estimation
+    
+    Returns:
+        dataframe containing x (kernels), density, scaled, count and n
+    """
+    nx = len(x)
+    if nx < 2:
+        warnings.warn("stat_pde_density: Groups with fewer than two "\
+                      "data points have been dropped.")
+        return pd.DataFrame([[np.nan, np.nan, np.nan, np.nan, np.nan]], 
+                            columns=["x", "density", "scaled", 
+                                     "count", "n"])
+    
+    rng = random_generator(random_state)
+    flag = False
+    # counting stops at the second unique value
+    if count_unique(x.values, MaxUnique=1)[0] == 1:
+        warnings.warn("stat_pde_density: Only one unique value in "\
+                      "Data.")
+        x = pd.Series([x.iloc[0], 
+                       x.iloc[0] * rng.uniform(0.999, 1.001)])
+        flag = True
+    
+    dens = pareto_density_estimation(x, random_state=rng, 
+                                     binnedThreshold=binnedThreshold)
+    
+    if flag == True:
+        dens["kernels"] = pd.Series(dens["kernels"]) \
+        * rng.uniform(0.998, 1.002, len(dens["kernels"]))
+        y = dens["kernels"].max() - dens["kernels"].min()
+        dens["paretoDensity"] = pd.Series(dens["paretoDensity"])\
+        .apply(lambda x: 1 / y)
+    
+    dfReturn = pd.DataFrame(dens["kernels"], columns=["x"])
+    dfReturn["density"] = dens["paretoDensity"]
+    dfReturn["scaled"] = dens["paretoDensity"] \
+    / max(dens["paretoDensity"])
+    dfReturn["count"] = dfReturn["density"] * nx
+    dfReturn["n"] = nx
+    return dfReturn
+
+def pde_density_table(ragged, cache=None, VariableName="Variables", 
+                      KernelName="x", random_state=None, profiler=None,
+                      binnedThreshold=None):
+    """
+    Pareto densities of all variables of a RaggedColumns container as long
+    dataframe for stat_pde_density(precomputed=True)
+    
+    Args:
+        ragged (RaggedColumns): values of the variables
+        cache (DensityCache): cache of densities, shared with 
+                              stat_pde_density
+        VariableName (str): name of the column of the variables
+        KernelName (str): name of the column of the kernels
+        random_state (None / int / SeedSequence / Generator): seed, each 
+                     variable gets its own child generator
+        profiler (PhaseProfiler): records wall time and memory of the 
+                                  density of each variable (phase 
+                                  "Densities")
+        binnedThreshold (int): number of values above which the kernels are
+                               counted on binned data, see 
+                               pareto_density_estimation
+    
+    Returns:
+        dataframe with the columns VariableName, KernelName, density and n
+        (number of values)
+    """
+    lstSeeds = seed_sequence(random_state).spawn(len(ragged))
+    lstDens = []
+    for (strVar, values), seed in zip(ragged.items(), lstSeeds):
+        rng = np.random.default_rng(seed)
+        if profiler is not None:
+            mark = profiler.mark()
+        x = pd.Series(values)
+        key = None if cache is None \
+        else density_key(cache, values, binnedThreshold, seed)
+        if key is None:
+            dens = compute_pdedensity(x, rng, binnedThreshold)
+        else:
+            dens = cache.get(key)
+            if dens is None:
+                dens = compute_pdedensity(x, rng, binnedThreshold)
+                cache.put(key, dens)
+        dfDens = pd.DataFrame({VariableName: strVar, 
+                               KernelName: dens["x"].values,
+                               "density": dens["density"].values, 
+                               "n": len(values)}).dropna()
+        lstDens.append(dfDens)
+        if profiler is not None:
+            profiler.add_since(mark, "Densities", strVar, len(values))
+    if len(lstDens) == 0:
+        return pd.DataFrame(columns=[VariableName, KernelName, "density", 
+                                     "n"])
+    return pd.concat(lstDens, ignore_index=True)
 
 class stat_pde_density(stat):
     REQUIRED_AES = {'x', 'y'}
@@ -19,7 +158,9 @@ class stat_pde_density(stat):
                       'na_rm': True,
                       'adjust': 1, 'kernel': 'gaussian',
                       'n': 1024, 'trim': True,
-                      'scale': 'area'}
+                      'scale': 'area', 'cache': None, 'precomputed': False,
+                      'random_state': None, 'width': 0.9, 'profiler': None,
+                      'binned_threshold': None}
     DEFAULT_AES = {'weight': None}
     CREATES = {'width'}
     
@@ -51,45 +192,68 @@ class stat_pde_density(stat):
 
         return data
     
+    @staticmethod
+    def variable_name(data, scales):
+        """
+        Name of the variable of a group: the label of its discrete x 
+        position, the group number if x is continuous
+        """
+        # the module of scale_discrete differs between plotnine versions
+        isDiscrete = any(cls.__name__ == "scale_discrete" 
+                         for cls in type(scales.x).__mro__)
+        if isDiscrete:
+            limits = list(scales.x.limits)
+            position = int(round(data["x"].iloc[0]))
+            if 1 <= position <= len(limits):
+                return limits[position - 1]
+        return data["group"].iloc[0]
+    
     @classmethod
     def compute_group(cls, data, scales, **params):
-        def compute_pdedensity(x):
-            nx = len(x)
-            if nx < 2:
-                warnings.warn("stat_pde_density: Groups with fewer than two "\
-                              "data points have been dropped.")
-                return pd.DataFrame([[np.nan, np.nan, np.nan, np.nan, np.nan]], 
-                                    columns=["x", "density", "scaled", 
-                                             "count", "n"])
-            
-            flag = False
-            if len(list(x.unique())) == 1:
-                warnings.warn("stat_pde_density: Only one unique value in "\
-                              "Data.")
-                x = pd.Series([x.iloc[0], 
-                               x.iloc[0] * np.random.uniform(0.999, 1.001)])
-                flag = True
-            
-            dens = pareto_density_estimation(x)
-            
-            if flag == True:
-                dens["kernels"] = pd.Series(dens["kernels"])\
-                .apply(lambda x: x * np.random.uniform(0.998, 1.002))
-                y = dens["kernels"].max() - dens["kernels"].min()
-                dens["paretoDensity"] = pd.Series(dens["paretoDensity"])\
-                .apply(lambda x: 1 / y)
-            
-            dfReturn = pd.DataFrame(dens["kernels"], columns=["x"])
-            dfReturn["density"] = dens["paretoDensity"]
-            dfReturn["scaled"] = dens["paretoDensity"] \
-            / max(dens["paretoDensity"])
+        def precomputed_pdedensity(data):
+            # kernels are mapped to y, the densities to weight and the 
+            # optional number of values to n
+            if "weight" not in data.columns:
+                raise PlotnineError("stat_pde_density: precomputed "
+                                    "densities have to be mapped to the "
+                                    "aesthetic weight")
+            dfDens = data[["y", "weight"]].dropna().sort_values("y")
+            dfReturn = pd.DataFrame({"x": dfDens["y"].values, 
+                                     "density": dfDens["weight"].values})
+            dfReturn["scaled"] = dfReturn["density"] \
+            / dfReturn["density"].max()
+            # if the number of data points is unknown, all variables are 
+            # counted equally for scale='count'
+            nx = data["n"].iloc[0] if "n" in data.columns else 1
             dfReturn["count"] = dfReturn["density"] * nx
             dfReturn["n"] = nx
             return dfReturn
         
-        dens = compute_pdedensity(data["y"])
+        profiler = params.get('profiler')
+        if profiler is not None:
+            mark = profiler.mark()
+        cache = params.get('cache')
+        if params.get('precomputed', False):
+            dens = precomputed_pdedensity(data)
+        else:
+            key = None if cache is None \
+            else density_key(cache, data["y"].values, 
+                             params.get('binned_threshold'), 
+                             params['random_state'])
+            if key is None:
+                dens = compute_pdedensity(data["y"], params['random_state'],
+                                          params.get('binned_threshold'))
+            else:
+                dens = cache.get(key)
+            if dens is None:
+                dens = compute_pdedensity(data["y"], params['random_state'],
+                                          params.get('binned_threshold'))
+                cache.put(key, dens)
         dens["y"] = dens["x"]
         dens["x"] = data["x"].mean()
-        dens["width"] = 0.9
+        dens["width"] = params['width']
+        if profiler is not None:
+            profiler.add_since(mark, "Densities", 
+                               cls.variable_name(data, scales), len(data))
         
         return dens
\ No newline at end of file
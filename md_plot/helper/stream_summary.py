@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_numeric_dtype
+from .sampling import random_generator
+from .kernel_histogram import KernelHistogram
+
+logger = logging.getLogger("md_plot")
+
+
+class StreamSummary:
+    """
+    Streaming summary of data which does not fit into memory. Chunks of
+    data are added one after another, for each column a reservoir sample
+    of the finite values, streaming counts (number of rows, nan and
+    infinite values, unique values, minimum and maximum), running moments
+    (mean and variance) and optionally a KernelHistogram are kept. The 
+    cost of adding a chunk depends on the chunk and not on the data added
+    before.
+    
+    Args:
+        SampleSize (int): size of the reservoir sample per column
+        MaxUnique (int): unique values are counted exactly up to MaxUnique,
+                         above only the lower bound MaxUnique + 1 is 
+                         reported
+        random_state (None / int / Generator): seed for the reservoir
+                     sampling, if None the seed is drawn from numpy's
+                     global random state
+        HistogramBins (int): maximal number of bins of a KernelHistogram of
+                             the finite values of each column, None keeps
+                             no histogram
+    
+    Usage:
+        summary = StreamSummary()
+        for chunk in pd.read_csv(path, chunksize=10**6):
+            summary.update(chunk)
+        summary.sample()
+        summary.summary()
+    """
+    
+    def __init__(self, SampleSize=500000, MaxUnique=100000,
+                 random_state=None, HistogramBins=None):
+        self.SampleSize = SampleSize
+        self.MaxUnique = MaxUnique
+        self.HistogramBins = HistogramBins
+        self.rng = random_generator(random_state)
+        self.lstCols = []
+        self.lstDropped = []
+        self.dctColumns = {}
+    
+    def _new_column(self):
+        if self.HistogramBins is None:
+            histogram = None
+        else:
+            histogram = KernelHistogram(MaxBins=self.HistogramBins)
+        return {"n": 0, "nNan": 0, "nInf": 0, "nSeen": 0,
+                "min": np.nan, "max": np.nan, "mean": 0.0, "M2": 0.0,
+                "unique": np.array([], dtype=float), "uniqueCapped": False,
+                "reservoir": np.empty(0, dtype=float), 
+                "histogram": histogram}
+    
+    def update_column(self, strCol, values):
+        """
+        Adds values of one column to the summary
+        
+        Args:
+            strCol (str): name of the column
+            values (array / series): numeric values of the column
+        """
+        if strCol not in self.dctColumns:
+            self.lstCols.append(strCol)
+            self.dctColumns[strCol] = self._new_column()
+        dctCol = self.dctColumns[strCol]
+        
+        values = np.asarray(values, dtype=float)
+        isNan = np.isnan(values)
+        isInf = np.isinf(values)
+        finite = values[~(isNan | isInf)]
+        dctCol["n"] += len(values)
+        dctCol["nNan"] += int(isNan.sum())
+        dctCol["nInf"] += int(isInf.sum())
+        if len(finite) == 0:
+            return
+        
+        dctCol["min"] = np.nanmin([dctCol["min"], finite.min()])
+        dctCol["max"] = np.nanmax([dctCol["max"], finite.max()])
+        
+        # running moments, merged with the moments of the chunk (Chan et al.)
+        nTotal = dctCol["nSeen"] + len(finite)
+        meanChunk = finite.mean()
+        delta = meanChunk - dctCol["mean"]
+        dctCol["M2"] += ((finite - meanChunk)**2).sum() \
+        + delta**2 * dctCol["nSeen"] * len(finite) / nTotal
+        dctCol["mean"] += delta * len(finite) / nTotal
+        
+        if dctCol["histogram"] is not None:
+            dctCol["histogram"].update(finite)
+        
+        if not dctCol["uniqueCapped"]:
+            unique = np.union1d(dctCol["unique"], finite)
+            if len(unique) > self.MaxUnique:
+                dctCol["uniqueCapped"] = True
+                unique = np.array([], dtype=float)
+            dctCol["unique"] = unique
+        
+        # reservoir sampling (algorithm R), vectorized over the chunk
+        reservoir = dctCol["reservoir"]
+        nSeen = dctCol["nSeen"]
+        nFree = max(self.SampleSize - len(reservoir), 0)
+        if nFree > 0:
+            reservoir = np.append(reservoir, finite[:nFree])
+        rest = finite[nFree:]
+        if len(rest) > 0:
+            # the i-th value seen replaces a random slot with probability
+            # SampleSize / i
+            slots = self.rng.integers(0, nSeen + nFree
+                                      + np.arange(1, len(rest) + 1))
+            replace = np.flatnonzero(slots < self.SampleSize)
+            # later values overwrite earlier ones in the same slot
+            slots, first = np.unique(slots[replace][::-1], return_index=True)
+            reservoir[slots] = rest[replace][::-1][first]
+        dctCol["reservoir"] = reservoir
+        dctCol["nSeen"] = nSeen + len(finite)
+    
+    def update(self, chunk, Names=None):
+        """
+        Adds a chunk of data to the summary
+        
+        Args:
+            chunk (dataframe / array / arrow table): chunk of data, each
+                  column is one variable
+            Names (list): column names used if chunk is not a dataframe
+        """
+        if hasattr(chunk, "to_pandas"):
+            chunk = chunk.to_pandas()
+        if not isinstance(chunk, pd.DataFrame):
+            try:
+                chunk = np.asarray(chunk)
+                if chunk.ndim == 1:
+                    chunk = chunk[:, np.newaxis]
+                if Names is not None:
+                    chunk = pd.DataFrame(chunk, columns=Names)
+                else:
+                    chunk = pd.DataFrame(chunk)
+                    chunk = chunk.rename(columns=lambda x: "C_" + str(x))
+            except:
+                raise Exception("Chunk cannot be converted into pandas "
+                                "dataframe")
+        
+        for strCol in chunk.columns:
+            if strCol in self.lstDropped:
+                continue
+            if not is_numeric_dtype(chunk[strCol]):
+                logger.warning("Deleting non numeric column: %s", strCol)
+                self.lstDropped.append(strCol)
+                if strCol in self.dctColumns:
+                    self.lstCols.remove(strCol)
+                    del self.dctColumns[strCol]
+                continue
+            self.update_column(strCol, chunk[strCol].values)
+    
+    def update_long(self, chunk, ValueColumn, ClassColumn):
+        """
+        Adds a chunk of data in long table format, each class is one
+        variable
+        
+        Args:
+            chunk (dataframe): chunk of data
+            ValueColumn (str): name of the column of values
+            ClassColumn (str): name of the column with class identifiers
+        """
+        if hasattr(chunk, "to_pandas"):
+            chunk = chunk.to_pandas()
+        lstCols = list(chunk.columns)
+        if ValueColumn not in lstCols:
+            raise Exception("ValueColumn not contained in dataframe")
+        if ClassColumn not in lstCols:
+            raise Exception("ClassColumn not contained in dataframe")
+        for strClass, values in chunk.groupby(ClassColumn, sort=False)\
+        [ValueColumn]:
+            self.update_column(strClass, values.values)
+    
+    def sample(self):
+        """
+        Reservoir samples of all columns
+        
+        Returns:
+            dataframe with one column per variable, shorter samples are
+            padded with nan
+        """
+        return pd.DataFrame({strCol: pd.Series(
+                                 self.dctColumns[strCol]["reservoir"])
+                             for strCol in self.lstCols},
+                            columns=self.lstCols)
+    
+    def summary(self):
+        """
+        Streaming counts of all columns
+        
+        Returns:
+            dataframe with one row per column containing n, nFinite, nNan,
+            nInf, nUnique (MaxUnique + 1 as lower bound if uniqueCapped), 
+            uniqueCapped, min, max, mean and std of the finite values
+        """
+        lstRows = []
+        for strCol in self.lstCols:
+            dctCol = self.dctColumns[strCol]
+            if dctCol["uniqueCapped"]:
+                # more than MaxUnique unique values were seen
+                nUnique = self.MaxUnique + 1
+            else:
+                nUnique = len(dctCol["unique"])
+            if dctCol["nSeen"] > 1:
+                std = np.sqrt(dctCol["M2"] / (dctCol["nSeen"] - 1))
+            else:
+                std = np.nan
+            if dctCol["nSeen"] > 0:
+                mean = dctCol["mean"]
+            else:
+                mean = np.nan
+            lstRows.append({"n": dctCol["n"], "nFinite": dctCol["nSeen"],
+                            "nNan": dctCol["nNan"], "nInf": dctCol["nInf"],
+                            "nUnique": nUnique,
+                            "uniqueCapped": dctCol["uniqueCapped"],
+                            "min": dctCol["min"], "max": dctCol["max"],
+                            "mean": mean, "std": std})
+        dfSummary = pd.DataFrame(lstRows, index=self.lstCols,
+                                 columns=["n", "nFinite", "nNan", "nInf",
+                                          "nUnique", "uniqueCapped", "min",
+                                          "max", "mean", "std"])
+        dfSummary.index.name = "variable"
+        return dfSummary
@@ -5,18 +5,27 @@ Created on Wed Jun 19 10:31:20 2019
 @author: tinog_000
 """
 
+import logging
 import warnings
 import pandas as pd
 import numpy as np
 import plotnine as p9
 from pandas.api.types import is_numeric_dtype
-from scipy.stats.mstats import mquantiles
-from scipy.stats import norm, trim_mean, skewtest, kstest
-from .helper.robust_normalization import robust_normalization
-from .helper.signed_log import signed_log
-from .helper.bimodal import bimodal
-from .helper.stat_pde_density import stat_pde_density
-from .unidip import dip
+from .helper.scaler import Scaler, SCALINGS
+from .helper.bimodal import bimodal, bimodal_matrix
+from .helper.stat_pde_density import stat_pde_density, pde_density_table
+from .helper.ragged_columns import RaggedColumns
+from .helper.plot_summaries import boxplot_table, jitter_table, gaussian_table
+from .helper.column_statistics import column_statistics, analysis_sample
+from .helper.column_profile import column_profile
+from .helper.sampling import sample_positions, seed_sequence, random_generator
+from .helper.density_cache import DensityCache, DEFAULT_CACHE
+from .helper.phase_profiler import PhaseProfiler
+
+logger = logging.getLogger("md_plot")
+
+# maximal number of jittered points per variable
+MAX_JITTER_POINTS = 10000
 
 
 def MDplot(Data, Names=None, Ordering='Default', Scaling=None, 
@@ -25,9 +34,13 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
            MDscaling='width', LineColor='black', LineSize=0.01, 
            QuantityThreshold=40, UniqueValuesThreshold=12, 
            SampleSize=500000, SizeOfJitteredPoints=1, OnlyPlotOutput=True, 
-           ValueColumn=None, ClassColumn=None):
+           ValueColumn=None, ClassColumn=None, n_jobs=1, Cache=None, 
+           random_state=None, profile=False, Densities=None, 
+           BinnedThreshold=None):
     """
-    Plots a mirrored density plot for each numeric column
+    Plots a mirrored density plot for each numeric column. Notices (e.g. 
+    deleted columns or drawn samples) are logged to the logger "md_plot" 
+    with level WARNING.
     
     Args:
         Data (dataframe): dataframe containing data. Each column is one 
@@ -36,8 +49,9 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
         Names (list): list of column names (will be used if data is not a 
                       dataframe)
         Ordering (str): 'Default', 'Columnwise', 'Alphabetical' or 'Statistics'
-        Scaling (str): scaling method, one of: Percentalize, CompleteRobust, 
-                                               Robust, Log
+        Scaling (str / Scaler): scaling method, one of: Percentalize, 
+                                CompleteRobust, Robust, Log or a fitted 
+                                Scaler (e.g. fitted on reference data)
         Fill (str): color of MD-Plot
         RobustGaussian (bool): draw a gaussian distribution if column is 
                                gaussian
@@ -51,7 +65,10 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
         UniqueValuesThreshold (int): minimal number of unique values per 
                                          column
         SampleSize (int): number of samples used if number of rows is larger 
-                          than SampleSize
+                          than SampleSize. Densities of more than 
+                          BinnedThreshold values are counted on binned
+                          data, thus SampleSize=len(Data) is feasible for 
+                          millions of rows.
         OnlyPlotOutput (bool): if True than returning only ggplot object,
                                if False than returning dictionary containing 
                                ggplot object and additional infos
@@ -59,12 +76,81 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
                            (data in long table format)
         ClassColumn (str): name of the column with class identifiers for the 
                            value column (data in long table format)
+        n_jobs (int): number of worker processes for the statistics of the 
+                      columns, -1 uses all cores
+        Cache (bool / DensityCache): cache of densities and statistics 
+                                     shared across calls, True uses a 
+                                     module wide cache, None or False 
+                                     computes everything on each call
+        random_state (None / int / SeedSequence / Generator): seed of all 
+                     random numbers (sample of rows, statistical tests, 
+                     jitter and densities), if None the seed is drawn from 
+                     numpy's global random state
+        profile (bool / callable / PhaseProfiler): records wall time, rows 
+                and peak memory (see PhaseProfiler) of each phase and of the
+                statistics and the density of each column. The records are 
+                logged to the logger "md_plot" (level INFO), a callable is 
+                called with each record.
+        Densities (dataframe): precomputed pareto densities of some or all
+                               columns in the format of density_table 
+                               (columns Variables, x, density and n), e.g. 
+                               of a MDplotSession. They are drawn instead of
+                               densities estimated from Data for all columns
+                               drawn as MD-plot. Cannot be combined with 
+                               Scaling.
+        BinnedThreshold (int): number of values of a column above which 
+                               the kernels of its density are counted on 
+                               binned data, None uses BINNED_THRESHOLD of 
+                               pareto_density_estimation (1000000)
         
     Returns:
         ggplot object or dictionary containing ggplot object and additional 
-        infos
+        infos (Statistics: dataframe with the statistics per column, Scaler: 
+        fitted Scaler of Scaling, Profile: dataframe of the records of 
+        profile or None)
     """
     
+    if Cache is True:
+        Cache = DEFAULT_CACHE
+    elif Cache is None or Cache is False:
+        Cache = None
+    elif not isinstance(Cache, DensityCache):
+        raise Exception("Cache has to be None, True, False or a DensityCache")
+    
+    if isinstance(profile, PhaseProfiler):
+        profiler = profile
+    elif callable(profile):
+        profiler = PhaseProfiler(callback=profile)
+    else:
+        profiler = PhaseProfiler(enabled=profile == True)
+    try:
+        return _md_plot(Data, Names, Ordering, Scaling, Fill, RobustGaussian, 
+                        GaussianColor, Gaussian_lwd, BoxPlot, BoxColor, 
+                        MDscaling, LineColor, LineSize, QuantityThreshold, 
+                        UniqueValuesThreshold, SampleSize, 
+                        SizeOfJitteredPoints, OnlyPlotOutput, ValueColumn, 
+                        ClassColumn, n_jobs, Cache, random_state, Densities,
+                        BinnedThreshold, profiler)
+    finally:
+        # a failing phase must not leave tracemalloc running
+        profiler.stop()
+
+
+def _md_plot(Data, Names, Ordering, Scaling, Fill, RobustGaussian, 
+             GaussianColor, Gaussian_lwd, BoxPlot, BoxColor, 
+             MDscaling, LineColor, LineSize, QuantityThreshold, 
+             UniqueValuesThreshold, SampleSize, 
+             SizeOfJitteredPoints, OnlyPlotOutput, ValueColumn, 
+             ClassColumn, n_jobs, Cache, random_state, Densities,
+             BinnedThreshold, profiler):
+    """ phases of MDplot after the checks of Cache and profile """
+    profiler.start("Input", rows=len(Data))
+    
+    # independent random streams of the phases, thus each phase draws the 
+    # same numbers for a given random_state whatever the other phases do
+    seedSample, seedStats, seedOrder, seedJitter, seedDensity = \
+    seed_sequence(random_state).spawn(5)
+    
     if not isinstance(Data, pd.DataFrame):
         try:
             if Names is not None:
@@ -88,48 +174,82 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
         if ClassColumn not in lstCols:
             raise Exception("ClassColumn not contained in dataframe")
         
-        lstClasses = list(Data[ClassColumn].unique())
-        DataWide = pd.DataFrame()
-        for strClass in lstClasses:
-            if len(DataWide) == 0:
-                DataWide = Data[Data[ClassColumn] == strClass].copy()\
-                .reset_index(drop=True)
-                DataWide = DataWide.rename(columns={ValueColumn: strClass})
-                DataWide = DataWide[[strClass]]
-            else:
-                dfTemp = Data[Data[ClassColumn] == strClass].copy()\
-                .reset_index(drop=True)
-                dfTemp = dfTemp.rename(columns={ValueColumn: strClass})
-                dfTemp = dfTemp[[strClass]]
-                DataWide = DataWide.join(dfTemp, how='outer')
-        Data = DataWide.copy()
+        # single pass: position of each row within its class, classes in
+        # order of appearance (rows without class are dropped)
+        codes, lstClasses = pd.factorize(Data[ClassColumn])
+        if len(lstClasses) == 0:
+            raise Exception("ClassColumn does not contain any class")
+        values = Data[ValueColumn].values[codes >= 0]
+        codes = codes[codes >= 0]
+        position = pd.Series(codes).groupby(codes, sort=False).cumcount()\
+        .values
+        counts = np.bincount(codes, minlength=len(lstClasses))
+        if counts.min() == counts.max():
+            wide = np.empty((counts.max(), len(lstClasses)), 
+                            dtype=values.dtype)
+        elif is_numeric_dtype(values.dtype):
+            wide = np.full((counts.max(), len(lstClasses)), np.nan)
+        else:
+            wide = np.full((counts.max(), len(lstClasses)), np.nan, 
+                           dtype=object)
+        wide[position, codes] = values
+        Data = pd.DataFrame(wide, columns=list(lstClasses))
     
-    lstCols = list(Data.columns)
-    for strCol in lstCols:
+    lstCols = []
+    for strCol in Data.columns:
         if not is_numeric_dtype(Data[strCol]):
-            print("Deleting non numeric column: " + strCol)
-            Data = Data.drop([strCol], axis=1)
+            logger.warning("Deleting non numeric column: %s", strCol)
         else:
-            if abs(Data[strCol].sum()) == np.inf:
-                print("Deleting infinite column: " + strCol)
-                Data = Data.drop([strCol], axis=1)
+            lstCols.append(strCol)
+    # columns are selected at once instead of dropping them one by one
+    colSums = Data[lstCols].sum()
+    for strCol in lstCols:
+        if abs(colSums[strCol]) == np.inf:
+            logger.warning("Deleting infinite column: %s", strCol)
+    Data = Data[[strCol for strCol in lstCols 
+                 if abs(colSums[strCol]) != np.inf]]
     
     Data = Data.rename_axis("index", axis="index")\
     .rename_axis("variable", axis="columns")
     dvariables = Data.shape[1]
     nCases = Data.shape[0]
     
+    profiler.start("Sampling", rows=nCases)
     if nCases > SampleSize:
-        print('Data has more cases than "SampleSize". Drawing a sample for '
-              'faster computation. You can omit this by setting '
-              '"SampleSize=len(data)".')
-        sampledIndex = np.sort(np.random.choice(list(Data.index), 
-                                                size=SampleSize, 
-                                                replace=False))
-        Data = Data.loc[sampledIndex]
+        logger.warning('Data has more cases than "SampleSize". Drawing a '
+                       'sample for faster computation. You can omit this by '
+                       'setting "SampleSize=len(data)".')
+        Data = Data.iloc[sample_positions(nCases, SampleSize, seedSample)]
     
-    nPerVar = Data.apply(lambda x: len(x.dropna()))
-    nUniquePerVar = Data.apply(lambda x: len(list(x.dropna().unique())))
+    profiler.start("Counts", rows=len(Data))
+    # counts of all columns, unique values are only counted until the 
+    # threshold is exceeded
+    dfCounts = column_profile(Data, Statistics=False, 
+                              MaxUnique=UniqueValuesThreshold)
+    nPerVar = dfCounts["n"] - dfCounts["nNan"]
+    nUniquePerVar = dfCounts["nUnique"]
+    
+    profiler.start("Scaling", rows=len(Data))
+    # scaling with the parameters of a fitted scaler or fitted on Data
+    if isinstance(Scaling, Scaler):
+        scaler = Scaling
+    elif Scaling in SCALINGS:
+        scaler = Scaler(Scaling)
+    else:
+        scaler = None
+    if scaler is not None:
+        if Densities is not None:
+            raise Exception("Densities cannot be combined with Scaling")
+        if scaler is Scaling:
+            Data = scaler.transform(Data)
+        else:
+            # fitted and scaled in one pass
+            Data = scaler.fit_transform(Data)
+        if scaler.Scaling == "Log" and RobustGaussian == True:
+            RobustGaussian = False
+            logger.warning("log with robust gaussian does not work, because "
+                           "mean and variance is not valid description for "
+                           "log normal data")
     
     # renaming columns to nonumeric names
     lstCols = list(Data.columns)
@@ -142,135 +262,61 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
             dctCols[strCol] = str(strCol)
     Data = Data.rename(columns=dctCols)
     
-    if Scaling == "Percentalize":
-        Data = Data.apply(lambda x: 100 * (x - x.min()) / (x.max() - x.min()))
-    if Scaling == "CompleteRobust":
-        Data = robust_normalization(Data, centered=True, capped=True)
-    if Scaling == "Robust":
-        Data = robust_normalization(Data, centered=False, capped=False)
-    if Scaling == "Log":
-        Data = signed_log(Data, base="Ten")
-        if RobustGaussian == True:
-            RobustGaussian = False
-            print("log with robust gaussian does not work, because mean and "
-                  "variance is not valid description for log normal data")
-    
 #_______________________________________________Roboust Gaussian and Statistics
+    profiler.start("Statistics", rows=len(Data))
+    # per call cache of the analysis of each column (sample, quantiles, dip 
+    # and bimodal results), shared by the statistics and the ordering
+    dctAnalysis = {}
+    dfStats = None
+    dfProfile = None
     if RobustGaussian == True or Ordering == "Statistics":
-        Data = Data.applymap(lambda x: np.nan if abs(x) == np.inf else x)
+        # statistics of all columns with one sort per column
+        dfProfile = column_profile(Data)
+        for strCol in dfProfile.index[dfProfile["nInf"] > 0]:
+            Data[strCol] = Data[strCol].mask(np.isinf(Data[strCol]))
         
         if nCases < 50:
             warnings.warn("Sample is maybe too small for statistical testing")
         
-        factor = pd.Series([0.25, 0.75]).apply(lambda x: abs(norm.ppf(x)))\
-        .sum()
-        std = Data.std()
-        
-        dfQuartile = Data.apply(lambda x: mquantiles(x, [0.25, 0.75], 
-                                                     alphap=0.5, betap=0.5))
-        psIQR = dfQuartile.loc[1] - dfQuartile.loc[0]
-        dfIQR = pd.DataFrame([psIQR.values], columns=psIQR.index)
-        dfQuartile = pd.concat([dfQuartile, dfIQR])
-        dfQuartile.index = ["low", "hi", "iqr"]
-        dfMinMax = Data.apply(lambda x: mquantiles(x, [0.001, 0.999], 
-                                                   alphap=0.5, betap=0.5))
-        dfMinMax.index = ["min", "max"]
-        
-        shat = pd.Series()
-        mhat = pd.Series()
-        nonunimodal = pd.Series()
-        skewed = pd.Series()
-        bimodalprob = pd.Series()
-        isuniformdist = pd.Series()
-        nSample = max([10000, nCases])
-        normaldist = np.empty((nSample, dvariables))
-        normaldist[:] = np.nan
-        normaldist = pd.DataFrame(normaldist, columns=lstCols)
-        
-        for strCol in lstCols:
-            shat[strCol] = min([std[strCol], 
-                               dfQuartile[strCol].loc["iqr"] / factor])
-            mhat[strCol] = trim_mean(Data[strCol].dropna(), 0.1)
-            
-            if nCases > 45000 and nPerVar[strCol] > 8:
-                # statistical testing does not work with to many cases
-                sampledIndex = np.sort(np.random.choice(list(Data.index), 
-                                                size=45000, 
-                                                replace=False))
-                vec = Data[strCol].loc[sampledIndex]
-                if nUniquePerVar[strCol] > UniqueValuesThreshold:
-                    nonunimodal[strCol] = dip.diptst(vec.dropna(), numt=100)[1]
-                    skewed[strCol] = skewtest(vec)[1]
-                    args = (dfMinMax[strCol].loc["min"], 
-                            dfMinMax[strCol].loc["max"] \
-                            - dfMinMax[strCol].loc["min"])
-                    isuniformdist[strCol] = kstest(vec, "uniform", args)[1]
-                    bimodalprob[strCol] = bimodal(vec)["Bimodal"]
-                else:
-                    print("Not enough unique values for statistical testing, "
-                          "thus output of testing is ignored.")
-                    nonunimodal[strCol] = 1
-                    skewed[strCol] = 1
-                    isuniformdist[strCol] = 0
-                    bimodalprob[strCol] = 0
-            elif nPerVar[strCol] < 8:
-                warnings.warn("Sample of finite values to small to calculate "
-                              "agostino.test or dip.test for " + strCol)
-                nonunimodal[strCol] = 1
-                skewed[strCol] = 1
-                isuniformdist[strCol] = 0
-                bimodalprob[strCol] = 0
-            else:
-                if nUniquePerVar[strCol] > UniqueValuesThreshold:
-                    nonunimodal[strCol] = dip.diptst(Data[strCol].dropna(), 
-                                                                   numt=100)[1]
-                    skewed[strCol] = skewtest(Data[strCol])[1]
-                    args = (dfMinMax[strCol].loc["min"], 
-                            dfMinMax[strCol].loc["max"] \
-                            - dfMinMax[strCol].loc["min"])
-                    isuniformdist[strCol] = kstest(Data[strCol], 
-                                                   "uniform", args)[1]
-                    bimodalprob[strCol] = bimodal(Data[strCol])["Bimodal"]
-                else:
-                    print("Not enough unique values for statistical testing, "
-                          "thus output of testing is ignored.")
-                    nonunimodal[strCol] = 1
-                    skewed[strCol] = 1
-                    isuniformdist[strCol] = 0
-                    bimodalprob[strCol] = 0
-            
-            if isuniformdist[strCol] < 0.05 and nonunimodal[strCol] > 0.05 \
-            and skewed[strCol] > 0.05 and bimodalprob[strCol] < 0.05 \
-            and nPerVar[strCol] > QuantityThreshold \
-            and nUniquePerVar[strCol] > UniqueValuesThreshold:
-                normaldist[strCol] = np.random.normal(mhat[strCol], 
-                                                      shat[strCol], 
-                                                      nSample)
-                normaldist[strCol] = normaldist[strCol]\
-                .apply(lambda x: np.nan if x < Data[strCol].min() \
-                                 or x > Data[strCol].max() else x)
-        nonunimodal[nonunimodal == 0] = 0.0000000001
-        skewed[skewed == 0] = 0.0000000001
-        effectStrength = (-10 * np.log(skewed) - 10 * np.log(nonunimodal)) / 2
+        dfStats = column_statistics(Data, nPerVar, nUniquePerVar, nCases, 
+                                    QuantityThreshold, UniqueValuesThreshold, 
+                                    n_jobs=n_jobs, Analysis=dctAnalysis, 
+                                    Cache=Cache, Profile=dfProfile, 
+                                    random_state=seedStats, 
+                                    Profiler=profiler)
+        effectStrength = dfStats["effectStrength"]
         
 #______________________________________________________________________Ordering
+    profiler.start("Ordering", rows=len(Data))
     if Ordering == "Default":
-        bimodalprob = pd.Series()
+        rngOrder = random_generator(seedOrder)
+        bimodalprob = pd.Series(dtype=float)
+        lstFullCols = []
         for strCol in lstCols:
-            if nCases > 45000 and nPerVar[strCol] > 8:
-                sampledIndex = np.sort(np.random.choice(list(Data.index), 
-                                                size=45000, 
-                                                replace=False))
-                vec = Data[strCol].loc[sampledIndex]
-                bimodalprob[strCol] = bimodal(vec)["Bimodal"]
-            elif nPerVar[strCol] < 8:
+            dctCol = dctAnalysis.setdefault(strCol, {})
+            if nPerVar[strCol] < 8:
                 bimodalprob[strCol] = 0
+            elif "Bimodal" in dctCol:
+                bimodalprob[strCol] = dctCol["Bimodal"]
+            elif nCases > 45000 and nPerVar[strCol] > 8:
+                vec = analysis_sample(Data[strCol], nPerVar[strCol], nCases, 
+                                      dctCol, rngOrder)
+                dctCol["Bimodal"] = bimodal(vec)["Bimodal"]
+                bimodalprob[strCol] = dctCol["Bimodal"]
             else:
-                bimodalprob[strCol] = bimodal(Data[strCol])["Bimodal"]
+                lstFullCols.append(strCol)
+        # all columns without sampling are scored at once
+        if len(lstFullCols) > 0:
+            dfBimodal = bimodal_matrix(Data[lstFullCols])
+            for strCol in lstFullCols:
+                dctAnalysis[strCol]["Bimodal"] = dfBimodal.loc[strCol, 
+                                                               "Bimodal"]
+                bimodalprob[strCol] = dctAnalysis[strCol]["Bimodal"]
+        bimodalprob = bimodalprob[lstCols]
         if len(list(bimodalprob.unique())) < 2 and dvariables > 1 \
         and RobustGaussian == True:
             rangfolge = list(effectStrength.sort_values(ascending=False).index)
-            print("Using statistics for ordering instead of default")
+            logger.warning("Using statistics for ordering instead of default")
         else:
             rangfolge = list(bimodalprob.sort_values(ascending=False).index)
     
@@ -285,6 +331,7 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
         rangfolge = list(effectStrength.sort_values(ascending=False).index)
     
 #________________________________________________________________Data Reshaping
+    profiler.start("Reshaping", rows=len(Data))
     if nPerVar.min() < QuantityThreshold \
     or nUniquePerVar.min() < UniqueValuesThreshold:
         warnings.warn("Some columns have less than " + str(QuantityThreshold)
@@ -292,16 +339,21 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
                      + " unique values. Changing from MD-plot to Jitter-Plot "
                      "for these columns.")
         dataDensity = Data.copy()
-        mm = Data.median()
+        rngJitter = random_generator(seedJitter)
+        if dfProfile is not None:
+            mm = dfProfile["median"]
+        else:
+            mm = Data.median()
         for strCol in lstCols:
             if nPerVar[strCol] < QuantityThreshold \
             or nUniquePerVar[strCol] < UniqueValuesThreshold:
                 if mm[strCol] != 0:
                     dataDensity[strCol] = mm[strCol] \
-                    * np.random.uniform(-0.001, 0.001, nCases) + mm[strCol]
+                    * rngJitter.uniform(-0.001, 0.001, len(dataDensity)) \
+                    + mm[strCol]
                 else:
-                    dataDensity[strCol] = np.random.uniform(-0.001, 0.001, 
-                                                            nCases)
+                    dataDensity[strCol] = rngJitter.uniform(-0.001, 0.001, 
+                                                            len(dataDensity))
         # Generates in the cases where pdf cannot be estimated a scatter plot
         dataJitter = dataDensity.copy()
         # Delete all scatters for features where distributions can be estimated
@@ -310,59 +362,131 @@ def MDplot(Data, Names=None, Ordering='Default', Scaling=None,
             and nUniquePerVar[strCol] >= UniqueValuesThreshold:
                 dataJitter[strCol] = np.nan
         #apply ordering
-        dataframe = dataDensity[rangfolge].reset_index()\
-        .melt(id_vars=["index"])
+        ragged = RaggedColumns.from_frame(dataDensity[rangfolge])
     else:
-        dataframe = Data[rangfolge].reset_index().melt(id_vars=["index"])
+        ragged = RaggedColumns.from_frame(Data[rangfolge])
     
-    dctCols = {"index": "ID", "variable": "Variables", "value": "Values"}
-    dataframe = dataframe.rename(columns=dctCols)
+    # only the density curves are handed to plotnine, the values stay in 
+    # the compact ragged container
+    profiler.start("Densities", rows=int(nPerVar.sum()))
+    if Densities is None:
+        dfDensities = pde_density_table(ragged, cache=Cache, 
+                                        KernelName="Values", 
+                                        random_state=seedDensity, 
+                                        profiler=profiler, 
+                                        binnedThreshold=BinnedThreshold)
+    else:
+        # precomputed densities of the MD-plot columns, the densities of the
+        # jitter plot columns and of columns without precomputed density 
+        # are estimated
+        dfPre = Densities[["Variables", "x", "density", "n"]]\
+        .rename(columns={"x": "Values"})
+        dfPre["Variables"] = dfPre["Variables"].map(dctCols)
+        lstPre = [strCol for strCol in rangfolge 
+                  if strCol in set(dfPre["Variables"]) 
+                  and nPerVar[strCol] >= QuantityThreshold 
+                  and nUniquePerVar[strCol] >= UniqueValuesThreshold]
+        dfEstimated = pde_density_table(
+            ragged.subset([x for x in rangfolge if x not in lstPre]), 
+            cache=Cache, KernelName="Values", random_state=seedDensity, 
+            profiler=profiler, binnedThreshold=BinnedThreshold)
+        dfDensities = pd.concat([dfPre[dfPre["Variables"].isin(lstPre)], 
+                                 dfEstimated], ignore_index=True)
     
 #______________________________________________________________________Plotting
-    plot = p9.ggplot(dataframe, p9.aes(x="Variables", group="Variables", 
-                                        y="Values")) \
+    profiler.start("Plotting", rows=len(dfDensities))
+    plot = p9.ggplot(dfDensities, p9.aes(x="Variables", group="Variables", 
+                                          y="Values", weight="density", 
+                                          n="n")) \
                      + p9.scale_x_discrete(limits=rangfolge)
     
-    plot = plot + p9.geom_violin(stat = stat_pde_density(scale=MDscaling), 
+    plot = plot + p9.geom_violin(stat = stat_pde_density(scale=MDscaling,
+                                                         precomputed=True), 
                                  fill=Fill, colour=LineColor, 
                                  size=LineSize, trim=True) \
                            + p9.theme(axis_text_x=p9.element_text(rotation=90))
     
     if nPerVar.min() < QuantityThreshold \
     or nUniquePerVar.min() < UniqueValuesThreshold:
-        dataframejitter = dataJitter[rangfolge].reset_index()\
-        .melt(id_vars=["index"])
-        dataframejitter = dataframejitter.rename(columns=dctCols)
+        dataframejitter = jitter_table(RaggedColumns.from_frame(
+            dataJitter[rangfolge]), maxPoints=MAX_JITTER_POINTS, 
+            random_state=rngJitter)
+        # plotnine jittered the padded long table, whose nan values set the 
+        # resolution of the values and thus the jitter height to 0.4
+        if dataJitter[rangfolge].isnull().values.any():
+            jitterHeight = 0.4
+        else:
+            jitterHeight = None
         plot = plot + p9.geom_jitter(size=SizeOfJitteredPoints, 
                                      data=dataframejitter, colour=LineColor,
                                      mapping= p9.aes(x="Variables", 
                                                      group="Variables", 
                                                      y="Values"), 
-                                     position=p9.position_jitter(0.15))
+                                     position=p9.position_jitter(
+                                         0.15, height=jitterHeight, 
+                                         random_state=int(rngJitter.integers(
+                                             2**31 - 1))), 
+                                     inherit_aes=False)
     
     if RobustGaussian == True:
-        dfTemp = normaldist[rangfolge].reset_index().melt(id_vars=["index"])
-        dfTemp = dfTemp.rename(columns=dctCols)
-        if dfTemp["Values"].isnull().all() == False:
-            plot = plot + p9.geom_violin(data = dfTemp, 
+        # truncated normal densities on the kernels of the pareto densities
+        lstGauss = [strCol for strCol in rangfolge 
+                    if dfStats.loc[strCol, "isgaussian"] == True]
+        dfParams = dfStats.loc[lstGauss, ["mhat", "shat"]]
+        dfParams["min"] = dfProfile.loc[lstGauss, "min"]
+        dfParams["max"] = dfProfile.loc[lstGauss, "max"]
+        # number of values of the densities, thus precomputed densities 
+        # and their gaussians are scaled alike
+        dfParams["n"] = dfDensities.groupby("Variables")["n"].first()\
+        [lstGauss]
+        dfGauss = gaussian_table(dfDensities, dfParams, KernelName="Values")
+        if len(dfGauss) > 0:
+            plot = plot + p9.geom_violin(data = dfGauss, 
                                          mapping = p9.aes(x="Variables", 
                                                           group="Variables", 
-                                                          y="Values"), 
+                                                          y="Values", 
+                                                          weight="density", 
+                                                          n="n"), 
+                                         stat = stat_pde_density(
+                                             scale=MDscaling, width=1, 
+                                             precomputed=True), 
                                          colour=GaussianColor, alpha=0, 
-                                         scale=MDscaling, size=Gaussian_lwd, 
-                                         na_rm=True, trim=True, fill=None, 
-                                         position="identity", width=1)
+                                         size=Gaussian_lwd, trim=True, 
+                                         fill=None, position="identity", 
+                                         inherit_aes=False)
     
     if BoxPlot == True:
-        plot = plot + p9.stat_boxplot(geom = "errorbar", width = 0.5, 
-                                      color=BoxColor) \
-                    + p9.geom_boxplot(width=1, outlier_colour = None, alpha=0, 
+        dfBox = boxplot_table(ragged)
+        plot = plot + p9.geom_errorbar(data=dfBox, width = 0.5, 
+                                       color=BoxColor, 
+                                       mapping=p9.aes(x="Variables", 
+                                                      ymin="ymin", 
+                                                      ymax="ymax"), 
+                                       inherit_aes=False) \
+                    + p9.geom_boxplot(data=dfBox, stat="identity", width=1, 
+                                      outlier_colour = None, alpha=0, 
                                       fill='#ffffff', color=BoxColor, 
-                                      position="identity")
+                                      position="identity", 
+                                      mapping=p9.aes(x="Variables", 
+                                                     ymin="ymin", 
+                                                     lower="lower", 
+                                                     middle="middle", 
+                                                     upper="upper", 
+                                                     ymax="ymax", 
+                                                     outliers="outliers"), 
+                                      inherit_aes=False)
     
     if OnlyPlotOutput == True:
+        profiler.stop()
         return plot
     else:
+        profiler.start("Drawing", rows=len(dfDensities))
         print(plot)
+        profiler.stop()
+        if profiler.enabled:
+            dfTimings = profiler.to_frame()
+        else:
+            dfTimings = None
         return {"Ordering": rangfolge, "DataOrdered": Data[rangfolge], 
-                "ggplotObj": plot}
\ No newline at end of file
+                "ggplotObj": plot, "Statistics": dfStats, "Scaler": scaler,
+                "Profile": dfTimings}
\ No newline at end of file
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import pandas as pd
+import numpy as np
+import plotnine as p9
+from pandas.api.types import is_numeric_dtype
+from .helper.stat_pde_density import stat_pde_density, pde_density_table
+from .helper.ragged_columns import RaggedColumns
+
+logger = logging.getLogger("md_plot")
+
+
+def density_table(Data, Names=None, random_state=None, BinnedThreshold=None):
+    """
+    Pareto densities of all numeric columns in the long table format of
+    MDplot_density, e.g. computed in a batch job and stored
+    
+    Args:
+        Data (dataframe): dataframe containing data, each column is one
+                          variable
+        Names (list): list of column names (will be used if data is not a
+                      dataframe)
+        random_state (None / int / SeedSequence / Generator): seed of the 
+                     densities, each column gets its own child generator
+        BinnedThreshold (int): number of values of a column above which the
+                               kernels are counted on binned data, see 
+                               MDplot
+    
+    Returns:
+        dataframe with the columns Variables, x (kernels), density and n
+    """
+    if not isinstance(Data, pd.DataFrame):
+        try:
+            Data = pd.DataFrame(Data, columns=Names)
+        except:
+            raise Exception("Data cannot be converted into pandas dataframe")
+    
+    lstCols = []
+    for strCol in Data.columns:
+        if not is_numeric_dtype(Data[strCol]):
+            logger.warning("Deleting non numeric column: %s", strCol)
+        else:
+            lstCols.append(strCol)
+    if len(lstCols) == 0:
+        raise Exception("Data does not contain any numeric column")
+    Data = Data[lstCols].replace([np.inf, -np.inf], np.nan)
+    return pde_density_table(RaggedColumns.from_frame(Data), 
+                             random_state=random_state, 
+                             binnedThreshold=BinnedThreshold)
+
+
+def MDplot_density(Densities, Ordering='Columnwise', Fill='darkblue',
+                   MDscaling='width', LineColor='black', LineSize=0.01,
+                   VariableColumn='Variables', KernelColumn='x',
+                   DensityColumn='density', CountColumn='n', 
+                   OnlyPlotOutput=True):
+    """
+    Plots a mirrored density plot from precomputed densities without the
+    raw data, e.g. densities computed with density_table in a batch job
+    
+    Args:
+        Densities (dataframe / dict): long dataframe with one row per kernel
+                                      (columns VariableColumn, KernelColumn
+                                      and DensityColumn) or dictionary of
+                                      (kernels, density) per variable
+        Ordering (str / list): 'Columnwise' (order of appearance),
+                               'Alphabetical' or a list of variables
+        Fill (str): color of MD-Plot
+        MDscaling (str): scale of ggplot violin, 'count' treats all
+                         variables as equally large
+        LineColor (str): color of the lines of the violins
+        LineSize (float): line width of ggplot violin
+        VariableColumn (str): name of the column of the variables
+        KernelColumn (str): name of the column of the kernels
+        DensityColumn (str): name of the column of the densities
+        CountColumn (str): name of the optional column of the number of 
+                           values per variable, used for MDscaling='count'
+        OnlyPlotOutput (bool): if True than returning only ggplot object,
+                               if False than returning dictionary containing
+                               ggplot object and ordering
+    
+    Returns:
+        ggplot object or dictionary containing ggplot object and ordering
+    """
+    if isinstance(Densities, dict):
+        lstDens = []
+        for strVar, (kernels, density) in Densities.items():
+            lstDens.append(pd.DataFrame({"Variables": strVar,
+                                         "x": np.asarray(kernels,
+                                                         dtype=float),
+                                         "density": np.asarray(density,
+                                                               dtype=float)}))
+        Densities = pd.concat(lstDens, ignore_index=True)
+    elif isinstance(Densities, pd.DataFrame):
+        for strCol in [VariableColumn, KernelColumn, DensityColumn]:
+            if strCol not in Densities.columns:
+                raise Exception(str(strCol) + " not contained in dataframe")
+        lstUsed = [VariableColumn, KernelColumn, DensityColumn]
+        if CountColumn in Densities.columns:
+            lstUsed.append(CountColumn)
+        Densities = Densities[lstUsed]\
+        .rename(columns={VariableColumn: "Variables", KernelColumn: "x",
+                         DensityColumn: "density", CountColumn: "n"})
+    else:
+        raise Exception("Densities have to be a dataframe or a dictionary")
+    
+    Densities["Variables"] = Densities["Variables"].astype(str)
+    lstCols = list(Densities["Variables"].unique())
+    if isinstance(Ordering, (list, tuple)):
+        rangfolge = [str(x) for x in Ordering]
+        if not set(rangfolge) <= set(lstCols):
+            raise Exception("Ordering contains unknown variables")
+    elif Ordering == "Columnwise":
+        rangfolge = lstCols
+    elif Ordering == "Alphabetical":
+        rangfolge = sorted(lstCols)
+    else:
+        raise Exception("Ordering has to be 'Columnwise', 'Alphabetical' or "
+                        "a list of variables")
+    
+    if "n" in Densities.columns:
+        mapping = p9.aes(x="Variables", group="Variables", y="x",
+                         weight="density", n="n")
+    else:
+        mapping = p9.aes(x="Variables", group="Variables", y="x",
+                         weight="density")
+    plot = p9.ggplot(Densities, mapping) \
+                     + p9.scale_x_discrete(limits=rangfolge)
+    
+    plot = plot + p9.geom_violin(stat = stat_pde_density(scale=MDscaling,
+                                                         precomputed=True),
+                                 fill=Fill, colour=LineColor,
+                                 size=LineSize, trim=True) \
+                           + p9.theme(axis_text_x=p9.element_text(rotation=90)) \
+                           + p9.ylab("Values")
+    
+    if OnlyPlotOutput == True:
+        return plot
+    else:
+        print(plot)
+        return {"Ordering": rangfolge, "ggplotObj": plot}
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import pandas as pd
+import numpy as np
+from scipy.stats.mstats import mquantiles
+from .md_plot import MDplot
+from .helper.stream_summary import StreamSummary
+from .helper.stat_pde_density import compute_pdedensity
+from .helper.pareto_density_estimation import pde_kernels
+from .helper.pareto_radius import pareto_radius
+from .helper.optimal_no_bins import optimal_no_bins_summary
+from .helper.kernel_histogram import binned_kernel_counts
+from .helper.sampling import seed_sequence, spawn_generators
+
+logger = logging.getLogger("md_plot")
+
+
+class MDplotSession:
+    """
+    Mirrored density plot of a growing table, e.g. a rolling table which is
+    redrawn as new rows arrive. For each column a reservoir sample, counts,
+    running moments and a KernelHistogram of all values appended so far are
+    kept (see StreamSummary), thus appending a batch costs time proportional
+    to the batch and not to the history.
+    
+    The densities are computed from the histograms with the kernels and the
+    pareto radius of pareto_density_estimation (radius and interquartile
+    range are taken from the reservoir sample, the number of values, the
+    standard deviation and the range from all values). Ordering, statistics,
+    jitter and box plots are computed by MDplot on the reservoir samples,
+    thus drawing costs do not grow with the history either.
+    
+    Args:
+        SampleSize (int): size of the reservoir sample per column
+        MaxUnique (int): unique values are counted exactly up to MaxUnique
+        HistogramBins (int): maximal number of bins of the histogram per
+                             column. The grid has at least HistogramBins / 4
+                             bins between minimum and maximum, a kernel
+                             count only differs from the exact count by
+                             values closer than one bin to the bounds of 
+                             the window of the kernel.
+        random_state (None / int / SeedSequence): seed of the reservoir
+                     sampling, the densities and MDplot
+        kwargs: further arguments of MDplot (Ordering, BoxPlot, ...),
+                Scaling is not supported
+    
+    Usage:
+        session = MDplotSession(Ordering="Statistics")
+        for batch in batches:
+            session.append(batch)
+            session.plot()
+    """
+    
+    def __init__(self, SampleSize=50000, MaxUnique=100000,
+                 HistogramBins=2**16, random_state=None, **kwargs):
+        seedSummary, self.seedPlot = seed_sequence(random_state).spawn(2)
+        self.summary = StreamSummary(SampleSize=SampleSize,
+                                     MaxUnique=MaxUnique,
+                                     random_state=seedSummary,
+                                     HistogramBins=HistogramBins)
+        self.kwargs = kwargs
+    
+    def append(self, batch, Names=None):
+        """
+        Adds a batch of rows
+        
+        Args:
+            batch (dataframe / array / arrow table): new rows, each column
+                                                     is one variable
+            Names (list): column names used if batch is not a dataframe
+        
+        Returns:
+            the session
+        """
+        self.summary.update(batch, Names=Names)
+        return self
+    
+    def append_long(self, batch, ValueColumn, ClassColumn):
+        """
+        Adds a batch of rows in long table format, each class is one
+        variable
+        
+        Args:
+            batch (dataframe): new rows
+            ValueColumn (str): name of the column of values
+            ClassColumn (str): name of the column with class identifiers
+        
+        Returns:
+            the session
+        """
+        self.summary.update_long(batch, ValueColumn, ClassColumn)
+        return self
+    
+    def _density(self, strCol, rng):
+        """ kernels and pareto density of one column from its state """
+        dctCol = self.summary.dctColumns[strCol]
+        sample = dctCol["reservoir"]
+        if len(sample) < 2 or len(np.unique(sample)) <= 2:
+            # too few values or dirac deltas, estimated from the sample
+            dens = compute_pdedensity(pd.Series(sample), rng)
+            return dens["x"].values, dens["density"].values
+        
+        nFinite = dctCol["nSeen"]
+        minData = dctCol["min"]
+        maxData = dctCol["max"]
+        paretoRadius = pareto_radius(sample, random_state=rng,
+                                     nTotal=nFinite)
+        p = mquantiles(sample, [0.25, 0.75], alphap=1/3, betap=1/3)
+        std = np.sqrt(dctCol["M2"] / (nFinite - 1))
+        nBins = optimal_no_bins_summary(nFinite, std, p[1] - p[0],
+                                        maxData - minData)
+        kernels = pde_kernels(minData, maxData, nBins)
+        
+        histogram = dctCol["histogram"]
+        paretoDensity = binned_kernel_counts(histogram.centers(),
+                                             histogram.counts, kernels,
+                                             paretoRadius, minData, maxData)
+        area = np.trapz(paretoDensity, kernels)
+        if (pd.isnull(area)) | (area < 0.0000000001):
+            return kernels, np.zeros(len(kernels))
+        return kernels, paretoDensity / area
+    
+    def densities(self, random_state=None):
+        """
+        Pareto densities of all columns from the state of the session
+        
+        Args:
+            random_state (None / int / SeedSequence / Generator): seed of the
+                         sample of the pareto radius, each column gets its
+                         own child generator
+        
+        Returns:
+            dataframe with the columns Variables, x (kernels), density and n
+            (number of finite values) like density_table
+        """
+        lstCols = self.summary.lstCols
+        lstDens = []
+        for strCol, rng in zip(lstCols,
+                               spawn_generators(random_state, len(lstCols))):
+            kernels, density = self._density(strCol, rng)
+            lstDens.append(pd.DataFrame({
+                "Variables": strCol, "x": kernels, "density": density,
+                "n": self.summary.dctColumns[strCol]["nSeen"]}).dropna())
+        if len(lstDens) == 0:
+            return pd.DataFrame(columns=["Variables", "x", "density", "n"])
+        return pd.concat(lstDens, ignore_index=True)
+    
+    def plot(self, OnlyPlotOutput=True, **kwargs):
+        """
+        MD-plot of all values appended so far
+        
+        Args:
+            OnlyPlotOutput (bool): if True than returning only ggplot object,
+                                   if False than returning dictionary
+                                   containing ggplot object and additional
+                                   infos
+            kwargs: arguments of MDplot for this plot, replacing the
+                    arguments of the session
+        
+        Returns:
+            ggplot object or dictionary containing ggplot object and
+            additional infos of MDplot and StreamSummary (dataframe with the
+            streaming counts and moments per column)
+        """
+        if len(self.summary.lstCols) == 0:
+            raise Exception("Session does not contain any numeric data")
+        
+        # each plot draws new random numbers, reproducible by random_state
+        seedDensity, seedPlot = self.seedPlot.spawn(2)
+        dfSummary = self.summary.summary()
+        Data = self.summary.sample()
+        # MDplot drops columns containing infinite values
+        for strCol in self.summary.lstCols:
+            if dfSummary.loc[strCol, "nInf"] > 0:
+                logger.warning("Deleting infinite column: %s", strCol)
+                Data = Data.drop([strCol], axis=1)
+        
+        dctArgs = dict(self.kwargs)
+        dctArgs.update(kwargs)
+        result = MDplot(Data, SampleSize=max(len(Data), 1),
+                        random_state=seedPlot, OnlyPlotOutput=OnlyPlotOutput,
+                        Densities=self.densities(seedDensity), **dctArgs)
+        if OnlyPlotOutput == True:
+            return result
+        result["StreamSummary"] = dfSummary
+        return result
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from .md_plot import MDplot
+from .helper.stream_summary import StreamSummary
+from .helper.sampling import seed_sequence
+
+logger = logging.getLogger("md_plot")
+
+
+def MDplot_stream(Chunks, Names=None, ValueColumn=None, ClassColumn=None,
+                  SampleSize=500000, MaxUnique=100000, random_state=None,
+                  OnlyPlotOutput=True, **kwargs):
+    """
+    Plots a mirrored density plot for each numeric column of data which is
+    read chunk by chunk, e.g. from pd.read_csv(..., chunksize=...), from the
+    row groups of a parquet file or from a generator of arrays. The full
+    table is never held in memory, for each column a reservoir sample of
+    SampleSize finite values is drawn and plotted with MDplot.
+    
+    Args:
+        Chunks (iterable): chunks of data (dataframes, arrays or arrow
+                           tables), each column is one variable (wide table
+                           format, for long table format see ValueColumn and
+                           ClassColumn)
+        Names (list): list of column names (will be used if chunks are not
+                      dataframes)
+        ValueColumn (str): name of the column of values to be plotted
+                           (data in long table format)
+        ClassColumn (str): name of the column with class identifiers for the
+                           value column (data in long table format)
+        SampleSize (int): size of the reservoir sample per column
+        MaxUnique (int): unique values are counted exactly up to MaxUnique
+        random_state (None / int / SeedSequence): seed of the reservoir 
+                     sampling and of MDplot
+        OnlyPlotOutput (bool): if True than returning only ggplot object,
+                               if False than returning dictionary containing
+                               ggplot object and additional infos
+        kwargs: further arguments of MDplot (Ordering, Scaling, BoxPlot, ...)
+    
+    Returns:
+        ggplot object or dictionary containing ggplot object and additional
+        infos of MDplot and StreamSummary (dataframe with the streaming
+        counts per column: n, nFinite, nNan, nInf, nUnique (MaxUnique + 1 if
+        uniqueCapped), uniqueCapped, min, max, mean and std)
+    """
+    if (ValueColumn is None) != (ClassColumn is None):
+        raise Exception("ValueColumn and ClassColumn have to be given both")
+    
+    seedSummary, seedPlot = seed_sequence(random_state).spawn(2)
+    summary = StreamSummary(SampleSize=SampleSize, MaxUnique=MaxUnique,
+                            random_state=seedSummary)
+    for chunk in Chunks:
+        if ValueColumn is not None:
+            summary.update_long(chunk, ValueColumn, ClassColumn)
+        else:
+            summary.update(chunk, Names=Names)
+    
+    if len(summary.lstCols) == 0:
+        raise Exception("Chunks do not contain any numeric data")
+    
+    dfSummary = summary.summary()
+    Data = summary.sample()
+    # MDplot drops columns containing infinite values
+    for strCol in summary.lstCols:
+        if dfSummary.loc[strCol, "nInf"] > 0:
+            logger.warning("Deleting infinite column: %s", strCol)
+            Data = Data.drop([strCol], axis=1)
+    
+    result = MDplot(Data, SampleSize=SampleSize, random_state=seedPlot,
+                    OnlyPlotOutput=OnlyPlotOutput, **kwargs)
+    if OnlyPlotOutput == True:
+        return result
+    result["StreamSummary"] = dfSummary
+    return result
@@ -15,23 +15,110 @@
 """
 
 import collections
+import warnings
 import numpy as np
 
+from .dip_table import table_pval
+
+# bound of the relative rounding error of a slope, see _chain_touchpoints_
+_SLOPE_TOL_ = 64 * np.finfo(float).eps
+# vectorized slope evaluations per point before _gcm_ switches to the chain
+_SEARCH_BUDGET_ = 128
+
+def _chain_touchpoints_(lcdf, lidxs):
+    """ touchpoints of the greatest convex minorant in linear time
+
+        The touchpoints are the same as searching the minimal slope from
+        every touchpoint over all remaining points (first index on ties),
+        but the search only runs over the candidates of a monotone chain.
+        The chain drops a point only if it lies above a chord by more
+        than the rounding error of the slopes, thus points which tie with
+        the hull in floating point stay candidates. From a touchpoint the
+        slopes to the following candidates increase (convexity), so the
+        search stops at the first slope clearly above the minimum.
+    """
+    def slope_err(a, b):
+        try:
+            slope = (lcdf[b] - lcdf[a]) / (lidxs[b] - lidxs[a])
+            err = _SLOPE_TOL_ * ((abs(lcdf[a]) + abs(lcdf[b]))
+                                 / abs(lidxs[b] - lidxs[a]) + abs(slope))
+        except ZeroDivisionError:
+            # distinct indices can collapse in floating point, keep
+            # numpy's semantics (inf) like the vectorized slopes
+            with np.errstate(divide="ignore", invalid="ignore"):
+                slope = float(np.float64(lcdf[b] - lcdf[a])
+                              / np.float64(lidxs[b] - lidxs[a]))
+            err = 0.0
+        return slope, err
+
+    # monotone chain of candidate touchpoints
+    chain = [0]
+    for i in range(1, len(lcdf)):
+        while len(chain) > 1:
+            s_i, e_i = slope_err(chain[-2], i)
+            s_b, e_b = slope_err(chain[-2], chain[-1])
+            if s_i < s_b - e_i - e_b:
+                chain.pop()
+            else:
+                break
+        chain.append(i)
+
+    # minimal slope from each touchpoint
+    touchpoints = [0]
+    pos = 0
+    while pos < len(chain) - 1:
+        a = chain[pos]
+        best_s, best_e = slope_err(a, chain[pos+1])
+        best_pos = pos + 1
+        for k in range(pos + 2, len(chain)):
+            s, e = slope_err(a, chain[k])
+            if s < best_s:
+                best_s, best_e, best_pos = s, e, k
+            elif s > best_s + e + best_e:
+                break
+        pos = best_pos
+        touchpoints.append(chain[pos])
+    return touchpoints
+
 def _gcm_(cdf, idxs):
-    work_cdf = cdf
-    work_idxs = idxs
-    gcm = [work_cdf[0]]
+    """ greatest convex minorant and its touchpoints
+
+        The minimal slope from each touchpoint is searched vectorized over
+        all remaining points, which is fast as long as there are few
+        touchpoints. If the search exceeds _SEARCH_BUDGET_ slopes per
+        point (many touchpoints, e.g. concave input) the remaining
+        touchpoints come from the linear _chain_touchpoints_. Slopes and
+        minorant values are computed from the left touchpoint of each
+        segment in both cases, thus the result is bit-identical to the
+        former quadratic search, while the runtime is O(n).
+    """
     touchpoints = [0]
-    while len(work_cdf) > 1:
-        distances = work_idxs[1:] - work_idxs[0]
-        slopes = (work_cdf[1:] - work_cdf[0]) / distances
+    budget = _SEARCH_BUDGET_ * len(cdf)
+    start = 0
+    while len(cdf) - start > 1 and budget > 0:
+        distances = idxs[start+1:] - idxs[start]
+        slopes = (cdf[start+1:] - cdf[start]) / distances
+        budget -= len(slopes)
         minslope = slopes.min()
-        minslope_idx = np.where(slopes == minslope)[0][0] + 1
-        gcm.extend(work_cdf[0] + distances[:minslope_idx] * minslope)
-        touchpoints.append(touchpoints[-1] + minslope_idx)
-        work_cdf = work_cdf[minslope_idx:]
-        work_idxs = work_idxs[minslope_idx:]
-    return np.array(np.array(gcm)), np.array(touchpoints)
+        start += np.where(slopes == minslope)[0][0] + 1
+        touchpoints.append(start)
+    if len(cdf) - start > 1:
+        tail = _chain_touchpoints_(cdf[start:].tolist(),
+                                   idxs[start:].tolist())
+        touchpoints.extend([start + t for t in tail[1:]])
+    touchpoints = np.array(touchpoints)
+
+    # minorant between two touchpoints, evaluated from the left touchpoint
+    anchors = touchpoints[:-1]
+    slopes = (cdf[touchpoints[1:]] - cdf[anchors]) \
+        / (idxs[touchpoints[1:]] - idxs[anchors])
+    seg_lengths = np.diff(touchpoints)
+    anchors = np.repeat(anchors, seg_lengths)
+    slopes = np.repeat(slopes, seg_lengths)
+    gcm = np.empty(len(cdf))
+    gcm[0] = cdf[0]
+    gcm[1:] = cdf[anchors] + (idxs[1:] - idxs[anchors]) * slopes
+    return gcm, touchpoints
 
 def _lcm_(cdf, idxs):
     g, t = _gcm_(1-cdf[::-1], idxs.max() - idxs[::-1])
@@ -41,13 +128,40 @@ def _touch_diffs_(part1, part2, touchpoints):
     diff = np.abs((part2[touchpoints] - part1[touchpoints]))
     return diff.max(), diff
 
-def diptst(dat, is_hist=False, numt=1000):
-    """ diptest with pval """
+def diptst(dat, is_hist=False, numt=None, random_state=None,
+           simulate=False):
+    """ diptest with pval
+
+        The pvalue of samples is looked up in the shipped tables of the null
+        distribution (see dip_table), histograms and simulate=True simulate
+        numt uniform samples instead.
+
+        numt:         None (1000), number of simulated uniform samples, only
+                      used for histograms and simulate=True. Passing it for
+                      table lookups is deprecated.
+        random_state: None, int or np.random.Generator used for the
+                      simulation of the null distribution, None uses
+                      numpy's global random state
+        simulate:     False, simulate the null distribution on every call
+    """
     # sample dip
     d, (_, idxs, left, _, right, _) = dip_fn(dat, is_hist)
 
+    if not is_hist and not simulate:
+        if numt is not None:
+            warnings.warn("numt is ignored unless is_hist or simulate is "
+                          "True, the pvalue is looked up in the null "
+                          "distribution tables", DeprecationWarning)
+        return (d, table_pval(d, idxs.shape[0]), # dip, pvalue
+                (len(left)-1, len(idxs)-len(right)) # indices
+               )
+
+    if numt is None:
+        numt = 1000
     # simulate from null uniform
-    unifs = np.random.uniform(size=numt * idxs.shape[0])\
+    rng = np.random if random_state is None \
+        else np.random.default_rng(random_state)
+    unifs = rng.uniform(size=numt * idxs.shape[0])\
                      .reshape([numt, idxs.shape[0]])
     unif_dips = np.apply_along_axis(dip_fn, 1, unifs, is_hist, True)
 
@@ -0,0 +1,112 @@
+"""
+    Tables of the null distribution of Hartigans' dip statistic
+
+    Instead of simulating uniform samples on every call of diptst, the dip
+    of TABLE_NUMT uniform samples was simulated once for a grid of sample
+    sizes (similar to qDiptab of the R package diptest) and p-values are
+    interpolated between the neighbouring sample sizes. The tables are
+    shipped with the package (dip_null_tables.npz) and are loaded once per
+    process, thus no call of diptst has to simulate them.
+
+    build_tables() simulates the tables again with fixed seeds (takes
+    several minutes), e.g. after TABLE_N or TABLE_NUMT was changed.
+"""
+
+import os
+import warnings
+import numpy as np
+
+# sample sizes of the tables, the dip scaled with sqrt(n) converges for
+# large n, so larger samples use the largest table
+TABLE_N = (5, 6, 7, 8, 9, 10, 15, 20, 30, 50, 100, 200, 500, 1000, 2000,
+           5000, 10000, 20000, 50000)
+# number of simulated uniform samples per table
+TABLE_NUMT = 1000
+TABLE_PATH = os.path.join(os.path.dirname(__file__), "dip_null_tables.npz")
+
+_tables_ = {}
+_loaded_ = []
+
+def _simulate_(n, numt, random_state):
+    """ sorted sqrt(n) * dip of numt uniform samples of size n """
+    from .dip import dip_fn
+    rng = np.random.default_rng(random_state)
+    dips = np.array([dip_fn(rng.uniform(size=n), False, True)
+                     for _ in range(numt)])
+    return np.sort(np.sqrt(n) * dips)
+
+def _load_tables_():
+    """ reads the shipped tables into memory, each table is checked on its
+        own, thus a missing or damaged table is simulated without losing the
+        others
+    """
+    _loaded_.append(True)
+    try:
+        tables = np.load(TABLE_PATH)
+    except (OSError, ValueError):
+        warnings.warn("Dip null distribution tables cannot be read from "
+                      + TABLE_PATH + ", all tables are simulated.")
+        return
+    with tables:
+        lstMissing = []
+        for n in TABLE_N:
+            key = "n{}".format(n)
+            try:
+                table = tables[key]
+            except (OSError, KeyError, ValueError):
+                table = None
+            if table is not None and table.shape == (TABLE_NUMT,):
+                _tables_[n] = table
+            else:
+                lstMissing.append(key)
+    if len(lstMissing) > 0:
+        warnings.warn("Dip null distribution tables " + ", ".join(lstMissing)
+                      + " are missing or damaged in " + TABLE_PATH
+                      + ", these tables are simulated.")
+
+def null_table(n):
+    """ sorted sqrt(n) * dip of TABLE_NUMT uniform samples of size n, n has
+        to be one of TABLE_N
+    """
+    if n not in _tables_:
+        if len(_loaded_) == 0:
+            _load_tables_()
+        if n not in _tables_:
+            # only if the package data is missing or damaged
+            _tables_[n] = _simulate_(n, TABLE_NUMT, random_state=n)
+    return _tables_[n]
+
+def build_tables(path=TABLE_PATH):
+    """ simulates all tables (seeded with n) and stores them in path """
+    np.savez_compressed(path, **{"n{}".format(n):
+                                 _simulate_(n, TABLE_NUMT, random_state=n)
+                                 for n in TABLE_N})
+
+def _pval_(table, scaled_dip):
+    """ share of simulated dips greater than the dip, 1 added like in
+        diptst to prevent a pvalue of 0
+    """
+    n_greater = len(table) - np.searchsorted(table, scaled_dip, side="right")
+    return (n_greater + 1) / (float(len(table)) + 1)
+
+def table_pval(d, n):
+    """ p-value of dip d of a sample with n (unique) values, interpolated
+        linearly in log(n) between the neighbouring tables
+    """
+    if n <= 4:
+        return None
+    grid = np.array(TABLE_N)
+    scaled_dip = np.sqrt(n) * d
+    if n >= grid[-1]:
+        return _pval_(null_table(grid[-1]), scaled_dip)
+    if n <= grid[0]:
+        return _pval_(null_table(grid[0]), scaled_dip)
+
+    upper = np.searchsorted(grid, n, side="right")
+    n_lo, n_hi = grid[upper-1], grid[upper]
+    p_lo = _pval_(null_table(n_lo), scaled_dip)
+    if n == n_lo:
+        return p_lo
+    p_hi = _pval_(null_table(n_hi), scaled_dip)
+    w = (np.log(n) - np.log(n_lo)) / (np.log(n_hi) - np.log(n_lo))
+    return (1 - w) * p_lo + w * p_hi
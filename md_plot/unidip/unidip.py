@@ -8,7 +8,7 @@ Algorithm:
 
 import numpy as np
 
-from unidip.dip import diptst
+from .dip import diptst
 
 class UniDip:
     """ Class containing the UniDip clustering algorithm.
@@ -20,7 +20,9 @@ class UniDip:
                      x axis to density along x axis
             alpha:   0.5, tuning parameter, sets significance
                      level of p_values
-            ntrials: 100, number of trials when running diptest
+            ntrials: 100, number of trials when running diptest on
+                     histograms, samples look up their pvalues in the
+                     null distribution tables and ignore it
             mrg_dst: 1, distance to merge returned intervals
             debug:   False, determines whether to plot 
                      the data at each recursion level
@@ -38,6 +40,12 @@ class UniDip:
         self.mrg_dst = mrg_dst
         self.debug = debug
 
+    def _diptst(self, dat):
+        """ diptest of a slice, ntrials is only used for histograms """
+        if self.is_hist:
+            return diptst(dat, True, self.ntrials)
+        return diptst(dat)
+
     def run(self):
         """ Perform unidip algorithm on 1d array
 
@@ -110,7 +118,7 @@ class UniDip:
         dat = self.dat[start:end]
         interval_idxs = list()
         
-        _, pval, modidx = diptst(dat, self.is_hist, self.ntrials)
+        _, pval, modidx = self._diptst(dat)
 
         if debug: # if plotting -> show intervals
             self.plot((start, end), [(start+modidx[0], start+modidx[1])])
@@ -139,13 +147,13 @@ class UniDip:
         h_idx = max(subd + [modidx])
 
         # recurse low
-        pval = diptst(dat[:l_idx[1]], self.is_hist, self.ntrials)[1]
+        pval = self._diptst(dat[:l_idx[1]])[1]
         if not pval is None and pval < self.alpha:
             rlidx = self._unidip(start, start+l_idx[0], False, debug)
             interval_idxs += rlidx
 
         # recurse high
-        pval = diptst(dat[h_idx[0]:], self.is_hist, self.ntrials)[1]
+        pval = self._diptst(dat[h_idx[0]:])[1]
         if not pval is None and pval < self.alpha:
             rhidx = self._unidip(start+h_idx[1], end, False, debug)
             interval_idxs += rhidx
@@ -165,9 +173,9 @@ class UniDip:
         """
         dat = self.dat[mod_int[0]:mod_int[1]]
         ldat = self._mirror_data(dat, left=True)
-        ldip = diptst(ldat, self.is_hist, self.ntrials)
+        ldip = self._diptst(ldat)
         rdat = self._mirror_data(dat, left=False)
-        rdip = diptst(rdat, self.is_hist, self.ntrials)
+        rdip = self._diptst(rdat)
 
         if ldip[0] > rdip[0]:
             full_indxs = self._un_mirror_idxs(ldip[2], len(dat), mod_int, True)
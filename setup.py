@@ -25,7 +25,7 @@ setup(name='md_plot',
       packages=find_packages(),
       install_requires=[
           'pandas>=0.24.2',
-          'numpy>=1.16',
+          'numpy>=1.17',
           'scipy>=1.1.0',
           'matplotlib>=3.1.0',
           'plotnine>=0.5.1',